@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog, font
 import serial
 import serial.tools.list_ports
 import threading
@@ -11,10 +11,25 @@ import sys
 import configparser
 from pathlib import Path
 import codecs
+import io
+import tempfile
+import mmap
+import bisect
+import gzip
+import lzma
+import shutil
+import select
+import selectors
 from collections import deque
+from array import array
 import json
+import struct
+import re
 import argparse
-from typing import Deque, Dict, Any, Tuple, Optional, Callable, Literal, Union
+import asyncio
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, wait as wait_futures
+from typing import Deque, Dict, Any, Iterator, List, Tuple, Optional, Callable, Literal, Union
 
 # --- Dependencias opcionales con manejo de errores ---
 try:
@@ -24,6 +39,13 @@ try:
 except ImportError:
     SV_TTK_AVAILABLE = False
 
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 IS_WINDOWS = sys.platform == "win32"
 if IS_WINDOWS:
     import ctypes
@@ -46,12 +68,23 @@ class Cfg:
     KEY_HANDSHAKE = "handshake"
     KEY_DTR_RESET = "dtr_reset"
     KEY_ENCODING = "encoding"
+    KEY_RECONNECT = "reconnect"
     # [Log]
     SEC_LOG = "Log"
     KEY_TIMESTAMP = "timestamp"
     KEY_DELIMITER = "delimiter"
     KEY_FILE = "file"
     KEY_ENABLED = "enabled"
+    KEY_CAPTURE = "capture"
+    KEY_FLUSH_BYTES = "flush_bytes"
+    KEY_FLUSH_MS = "flush_ms"
+    KEY_FLUSH_ON_IDLE = "flush_on_idle"
+    KEY_FSYNC_MS = "fsync_ms"
+    KEY_ROTATE_MB = "rotate_mb"
+    KEY_ROTATE_MINUTES = "rotate_minutes"
+    KEY_COMPRESSION = "compression"
+    KEY_RETAIN_MB = "retain_mb"
+    KEY_TIME_INDEX = "time_index"
     # [UI]
     SEC_UI = "UI"
     KEY_THEME = "theme"
@@ -59,8 +92,14 @@ class Cfg:
     KEY_HEX_VIEW = "hex_view"
     KEY_HEX_INPUT = "hex_input"
     KEY_PROTOCOL = "protocol"
+    KEY_DECODE_WORKERS = "decode_workers"
     KEY_AUTOSCROLL = "autoscroll"
     KEY_SHOW_CTRL_CHARS = "show_control_chars"
+    KEY_SCROLLBACK_LINES = "scrollback_lines"
+    # [Queues] capacidad y política de desborde de cada cola: display_size, display_policy, logger_size...
+    SEC_QUEUES = "Queues"
+    KEY_QUEUE_SIZE = "{}_size"
+    KEY_QUEUE_POLICY = "{}_policy"
 
 
 # --- Funciones de ayuda y decodificadores (Sin cambios) ---
@@ -68,9 +107,10 @@ def get_current_year() -> int:
     return datetime.datetime.now().year
 
 
-def get_timestamp(format_choice: str, delimiter: str) -> str:
+def get_timestamp(format_choice: str, delimiter: str, wall_ns: Optional[int] = None) -> str:
     if format_choice == "none": return ""
-    now = datetime.datetime.now()
+    # wall_ns: instante de llegada de los datos (Chunk.wall_ns); sin él se usa la hora actual
+    now = datetime.datetime.now() if wall_ns is None else datetime.datetime.fromtimestamp(wall_ns / 1_000_000_000)
     formats = {"ISO 8601": now.isoformat(sep='T', timespec='milliseconds'),
                "Date|Time|Timezone": now.astimezone().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + ' %Z',
                "Date|Time": now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3], "Time": now.strftime('%H:%M:%S.%f')[:-3],
@@ -83,11 +123,35 @@ def get_timestamp(format_choice: str, delimiter: str) -> str:
     return ""
 
 
-def parse_nmea_sentence(line: str) -> str:
+class DecodedRecord:
+    # Resultado de un decodificador: datos estructurados y baratos de crear. El texto multilínea solo se genera
+    # (y se guarda) cuando un destino lo pide con render(): panel visible, log a archivo...
+    __slots__ = ('protocol', 'type', 'fields', 'status', 'raw', 'timestamp', 'port', '_text')
+
+    def __init__(self, protocol: str, type: Optional[str], fields: Any = None, status: Optional[str] = None,
+                 raw: Union[str, bytes] = ''):
+        self.protocol = protocol
+        self.type = type
+        self.fields = fields
+        self.status = status  # None = correcto; si no, la etiqueta del error
+        self.raw = raw
+        self.timestamp: Optional[int] = None  # wall_ns del bloque de origen
+        self.port: Optional[str] = None
+        self._text: Optional[str] = None
+
+    def render(self) -> str:
+        if self._text is None: self._text = RECORD_RENDERERS.get(self.protocol, Decoder.render)(self)
+        return self._text
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+def decode_nmea_sentence(line: str) -> DecodedRecord:
     line = line.strip()
-    if not line.startswith('$') or '*' not in line: return f"[NO NMEA] {line}\n"
+    if not line.startswith('$') or '*' not in line: return DecodedRecord("NMEA-0183", None, None, "NO NMEA", line)
     parts = line.split('*');
-    if len(parts) != 2: return f"[FORMATO NMEA INVÁLIDO] {line}\n"
+    if len(parts) != 2: return DecodedRecord("NMEA-0183", None, None, "FORMATO NMEA INVÁLIDO", line)
     sentence, checksum_str = parts;
     sentence_data = sentence[1:]
     calculated_checksum = 0
@@ -95,39 +159,51 @@ def parse_nmea_sentence(line: str) -> str:
     try:
         received_checksum = int(checksum_str, 16)
     except ValueError:
-        return f"[CHECKSUM INVÁLIDO] {line}\n"
-    if calculated_checksum != received_checksum: return f"[ERROR CHECKSUM: Calc={calculated_checksum:02X}, Recib={received_checksum:02X}] {line}\n"
+        return DecodedRecord("NMEA-0183", None, None, "CHECKSUM INVÁLIDO", line)
+    if calculated_checksum != received_checksum:
+        return DecodedRecord("NMEA-0183", None, (calculated_checksum, received_checksum), "ERROR CHECKSUM", line)
     fields = sentence_data.split(',');
     msg_type = fields[0]
-    if msg_type == "GPGGA":
-        try:
-            return (f"--- GGA: Global Positioning System Fix Data ---\n"
-                    f"  Hora (UTC):      {fields[1][:2]}:{fields[1][2:4]}:{fields[1][4:]}\n"
-                    f"  Latitud:         {fields[2]} {fields[3]}\n"
-                    f"  Longitud:        {fields[4]} {fields[5]}\n"
-                    f"  Calidad Fix:     {fields[6]} (0=inv, 1=GPS, 2=DGPS)\n"
-                    f"  Satélites:       {fields[7]}\n"
-                    f"  HDOP:            {fields[8]}\n"
-                    f"  Altitud:         {fields[9]} {fields[10]}\n"
-                    f"--------------------------------------------------\n")
-        except IndexError:
-            return f"[GPGGA MAL FORMADO] {line}\n"
-    elif msg_type == "GPRMC":
-        try:
-            return (f"--- RMC: Recommended Minimum Specific GNSS Data ---\n"
-                    f"  Hora (UTC):      {fields[1][:2]}:{fields[1][2:4]}:{fields[1][4:]}\n"
-                    f"  Estado:          {'A=Activo, V=Vacio' if fields[2] in 'AV' else fields[2]}\n"
-                    f"  Velocidad (nudos): {fields[7]}\n"
-                    f"  Rumbo:           {fields[8]}\n"
-                    f"  Fecha:           {fields[9][:2]}/{fields[9][2:4]}/20{fields[9][4:]}\n"
-                    f"--------------------------------------------------\n")
-        except IndexError:
-            return f"[GPRMC MAL FORMADO] {line}\n"
-    else:
-        return f"[TIPO NMEA NO SOPORTADO: {msg_type}] {line}\n"
+    if msg_type == "GPGGA" and len(fields) < 11: return DecodedRecord("NMEA-0183", msg_type, None,
+                                                                      "GPGGA MAL FORMADO", line)
+    if msg_type == "GPRMC" and len(fields) < 10: return DecodedRecord("NMEA-0183", msg_type, None,
+                                                                      "GPRMC MAL FORMADO", line)
+    if msg_type not in ("GPGGA", "GPRMC"): return DecodedRecord("NMEA-0183", msg_type, None,
+                                                                "TIPO NMEA NO SOPORTADO", line)
+    return DecodedRecord("NMEA-0183", msg_type, fields, None, line)
+
+
+def render_nmea_sentence(record: DecodedRecord) -> str:
+    line, fields = record.raw, record.fields
+    if record.status == "ERROR CHECKSUM":
+        return f"[ERROR CHECKSUM: Calc={fields[0]:02X}, Recib={fields[1]:02X}] {line}\n"
+    if record.status == "TIPO NMEA NO SOPORTADO": return f"[TIPO NMEA NO SOPORTADO: {record.type}] {line}\n"
+    if record.status: return f"[{record.status}] {line}\n"
+    if record.type == "GPGGA":
+        return (f"--- GGA: Global Positioning System Fix Data ---\n"
+                f"  Hora (UTC):      {fields[1][:2]}:{fields[1][2:4]}:{fields[1][4:]}\n"
+                f"  Latitud:         {fields[2]} {fields[3]}\n"
+                f"  Longitud:        {fields[4]} {fields[5]}\n"
+                f"  Calidad Fix:     {fields[6]} (0=inv, 1=GPS, 2=DGPS)\n"
+                f"  Satélites:       {fields[7]}\n"
+                f"  HDOP:            {fields[8]}\n"
+                f"  Altitud:         {fields[9]} {fields[10]}\n"
+                f"--------------------------------------------------\n")
+    return (f"--- RMC: Recommended Minimum Specific GNSS Data ---\n"
+            f"  Hora (UTC):      {fields[1][:2]}:{fields[1][2:4]}:{fields[1][4:]}\n"
+            f"  Estado:          {'A=Activo, V=Vacio' if fields[2] in 'AV' else fields[2]}\n"
+            f"  Velocidad (nudos): {fields[7]}\n"
+            f"  Rumbo:           {fields[8]}\n"
+            f"  Fecha:           {fields[9][:2]}/{fields[9][2:4]}/20{fields[9][4:]}\n"
+            f"--------------------------------------------------\n")
 
 
-def calculate_crc16(data: bytes) -> int:
+def parse_nmea_sentence(line: str) -> str:
+    return decode_nmea_sentence(line).render()
+
+
+def calculate_crc16_bitwise(data: bytes) -> int:
+    # Versión bit a bit original; se conserva como referencia para --benchmark
     crc = 0xFFFF
     for byte in data:
         crc ^= byte
@@ -140,18 +216,74 @@ def calculate_crc16(data: bytes) -> int:
     return crc
 
 
-def parse_modbus_rtu(raw_bytes: bytes) -> str:
-    if len(raw_bytes) < 4: return f"[TRAMA MODBUS MUY CORTA: {raw_bytes.hex(' ').upper()}]\n"
-    address = raw_bytes[0];
-    function_code = raw_bytes[1];
-    payload = raw_bytes[2:-2]
+def _make_crc16_table() -> Tuple[int, ...]:
+    # Las 8 iteraciones bit a bit de cada posible byte (polinomio reflejado 0xA001), precalculadas
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 0x0001 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_TABLE = _make_crc16_table()
+
+
+def calculate_crc16(data: bytes) -> int:
+    crc = 0xFFFF
+    table = CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def verify_crc16_batch(frames: List[bytes]) -> List[bool]:
+    # Verifica el CRC (últimos 2 bytes, little endian) de muchas tramas capturadas. Con numpy, las tramas de
+    # igual longitud se procesan juntas: un paso vectorizado por posición de byte en lugar de uno por byte.
+    if not NUMPY_AVAILABLE:
+        return [len(frame) >= 3 and calculate_crc16(frame[:-2]) == int.from_bytes(frame[-2:], 'little')
+                for frame in frames]
+    results = [False] * len(frames)
+    by_length: Dict[int, List[int]] = {}
+    for index, frame in enumerate(frames):
+        if len(frame) >= 3: by_length.setdefault(len(frame), []).append(index)
+    table = np.array(CRC16_TABLE, dtype=np.uint16)
+    for length, indices in by_length.items():
+        data = np.frombuffer(b''.join(bytes(frames[i]) for i in indices), dtype=np.uint8).reshape(-1, length)
+        crc = np.full(len(indices), 0xFFFF, dtype=np.uint16)
+        for column in range(length - 2):
+            crc = (crc >> 8) ^ table[(crc ^ data[:, column]) & 0xFF]
+        received = data[:, length - 2].astype(np.uint16) | (data[:, length - 1].astype(np.uint16) << 8)
+        for i, ok in zip(indices, (crc == received).tolist()): results[i] = ok
+    return results
+
+
+def decode_modbus_rtu(raw_bytes: Union[bytes, memoryview], kind: Optional[str] = None) -> DecodedRecord:
+    # Se copia la trama: raw_bytes suele ser una vista del buffer circular y el texto puede generarse mucho después
+    raw_bytes = bytes(raw_bytes)
+    if kind == "invalid": return DecodedRecord("Modbus-RTU", kind, None, "DESCARTADO", raw_bytes)
+    if len(raw_bytes) < 4: return DecodedRecord("Modbus-RTU", kind, None, "MUY CORTA", raw_bytes)
     received_crc = int.from_bytes(raw_bytes[-2:], 'little')
     calculated_crc = calculate_crc16(raw_bytes[:-2])
+    return DecodedRecord("Modbus-RTU", kind, (raw_bytes[0], raw_bytes[1], received_crc, calculated_crc),
+                         None if received_crc == calculated_crc else "ERROR CRC", raw_bytes)
+
+
+def render_modbus_rtu(record: DecodedRecord) -> str:
+    raw_bytes = record.raw
+    if record.status == "DESCARTADO":
+        return f"[BYTES MODBUS DESCARTADOS ({len(raw_bytes)}): {raw_bytes.hex(' ').upper()}]\n"
+    if record.status == "MUY CORTA": return f"[TRAMA MODBUS MUY CORTA: {raw_bytes.hex(' ').upper()}]\n"
+    address, function_code, received_crc, calculated_crc = record.fields
+    payload = raw_bytes[2:-2]
     crc_status = "OK" if received_crc == calculated_crc else f"ERROR (Calc: {calculated_crc:04X})"
     func_map = {1: "Read Coils", 2: "Read Discrete Inputs", 3: "Read Holding Registers", 4: "Read Input Registers",
                 5: "Write Single Coil", 6: "Write Single Register"}
     func_name = func_map.get(function_code, f"Desconocido (0x{function_code:02X})")
+    kind_line = f"  Tipo:            {ModbusFrame.KIND_NAMES[record.type]}\n" if record.type else ""
     return (f"--- MODBUS RTU ---\n"
+            f"{kind_line}"
             f"  ID Esclavo:      {address}\n"
             f"  Función:         {function_code} ({func_name})\n"
             f"  Datos (Hex):     {payload.hex(' ').upper()}\n"
@@ -159,48 +291,1482 @@ def parse_modbus_rtu(raw_bytes: bytes) -> str:
             f"---------------------\n")
 
 
-def parse_can_ascii(line: str) -> str:
+def parse_modbus_rtu(raw_bytes: Union[bytes, memoryview], kind: Optional[str] = None) -> str:
+    return decode_modbus_rtu(raw_bytes, kind).render()
+
+
+class ModbusFrame:
+    # Trama reensamblada por ModbusRtuStreamParser. data es una vista (sin copia) del bloque recibido.
+    __slots__ = ('data', 'kind')
+    KIND_NAMES = {"request": "Petición", "response": "Respuesta", "exception": "Excepción", "invalid": "Descartado"}
+
+    def __init__(self, data: Union[memoryview, bytes], kind: str):
+        self.data = data
+        self.kind = kind
+
+
+class ModbusRtuStreamParser:
+    # Reensambla tramas Modbus RTU de un flujo partido o juntado arbitrariamente (media trama, petición y
+    # respuesta seguidas...). La longitud sale de las reglas de cada código de función y cada candidata se
+    # confirma con el CRC; si nada cuadra se descarta un byte y se vuelve a sincronizar.
+    MIN_FRAME = 4
+    MAX_FRAME = 256
+    MAX_ADDRESS = 247
+
+    def __init__(self):
+        self.carry = b''
+        self.discarded_bytes = 0
+
+    @staticmethod
+    def _candidates(data: memoryview, i: int, available: int) -> List[Tuple[str, Optional[int]]]:
+        # (tipo, longitud total con CRC); None si la longitud depende de un contador que aún no ha llegado
+        def counted(offset: int, size: int = 1) -> Optional[int]:
+            if available < offset + size: return None
+            return offset + size + int.from_bytes(data[i + offset:i + offset + size], 'big') + 2
+
+        function_code = data[i + 1]
+        if function_code & 0x80: return [("exception", 5)]
+        if function_code in (1, 2, 3, 4): return [("request", 8), ("response", counted(2))]
+        if function_code in (5, 6, 8): return [("request", 8)]
+        if function_code in (15, 16): return [("request", counted(6)), ("response", 8)]
+        if function_code == 7: return [("request", 4), ("response", 5)]
+        if function_code == 11: return [("request", 4), ("response", 8)]
+        if function_code in (12, 17): return [("request", 4), ("response", counted(2))]
+        if function_code == 22: return [("request", 10)]
+        if function_code == 23: return [("request", counted(10)), ("response", counted(2))]
+        if function_code == 24: return [("request", 6), ("response", counted(2, size=2))]
+        return []
+
+    def _match(self, data: memoryview, i: int, available: int) -> Tuple[Optional[ModbusFrame], bool]:
+        # Trama válida que empieza en i, y si alguna candidata aún podría completarse con más datos
+        if data[i] > self.MAX_ADDRESS: return None, False
+        waiting = False
+        for kind, length in self._candidates(data, i, available):
+            # Un contador que da más de MAX_FRAME no es una trama: se descarta sin esperar
+            if length is not None and length > self.MAX_FRAME: continue
+            if length is None or length > available:
+                waiting = True
+                continue
+            frame = data[i:i + length]
+            if calculate_crc16(frame[:-2]) == int.from_bytes(frame[-2:], 'little'):
+                return ModbusFrame(frame, kind), False
+        return None, waiting
+
+    def feed(self, chunk: Union[memoryview, bytes]) -> List[ModbusFrame]:
+        # Solo lo que queda a medias entre dos bloques se copia; las tramas completas son vistas del bloque
+        frames: List[ModbusFrame] = []
+        if self.carry:
+            # Si el bloque nuevo ya empieza con una trama válida, lo pendiente no era el principio de otra: se
+            # resuelve ahora en lugar de esperar a que se acumulen MAX_FRAME bytes detrás
+            view = memoryview(chunk)
+            if len(view) >= self.MIN_FRAME and self._match(view, 0, len(view))[0]: frames = self.flush()
+        data = memoryview(self.carry + bytes(chunk)) if self.carry else memoryview(chunk)
+        self.carry = b''
+        return frames + self._parse(data, final=False)
+
+    def _parse(self, data: memoryview, final: bool) -> List[ModbusFrame]:
+        # final=True: no llegará nada más, así que ninguna candidata se espera
+        frames: List[ModbusFrame] = []
+        size = len(data)
+        i = 0
+        garbage_start: Optional[int] = None
+        while size - i >= self.MIN_FRAME:
+            match, waiting = self._match(data, i, size - i)
+            if match:
+                if garbage_start is not None:
+                    frames.append(ModbusFrame(bytes(data[garbage_start:i]), "invalid"))
+                    garbage_start = None
+                frames.append(match)
+                i += len(match.data)
+                continue
+            # Una trama que aún puede completarse se espera; si no, el byte es basura
+            if waiting and not final: break
+            if garbage_start is None: garbage_start = i
+            self.discarded_bytes += 1
+            i += 1
+        if final and i < size:
+            if garbage_start is None: garbage_start = i
+            self.discarded_bytes += size - i
+            i = size
+        if garbage_start is not None: frames.append(ModbusFrame(bytes(data[garbage_start:i]), "invalid"))
+        self.carry = bytes(data[i:])
+        return frames
+
+    def flush(self) -> List[ModbusFrame]:
+        # Al cerrar, lo pendiente se resuelve sin esperar más datos: tramas válidas que contenga y el resto descartado
+        carry, self.carry = self.carry, b''
+        return self._parse(memoryview(carry), final=True) if carry else []
+
+
+def decode_can_ascii(line: str) -> DecodedRecord:
     line = line.strip()
-    if not line or line[0].lower() != 't': return f"[NO CAN-ASCII] {line}\n"
+    if not line or line[0].lower() != 't': return DecodedRecord("CAN-ASCII", None, None, "NO CAN-ASCII", line)
     try:
         can_id_str = line[1:4];
         data_len = int(line[4]);
         data_str = line[5:5 + data_len * 2]
         can_id = int(can_id_str, 16);
         data_bytes = bytes.fromhex(data_str)
-        return (f"--- CAN ASCII ---\n"
-                f"  ID:            0x{can_id:03X}\n"
-                f"  DLC:           {data_len}\n"
-                f"  Datos:         {' '.join(f'{b:02X}' for b in data_bytes)}\n"
-                f"-------------------\n")
+        return DecodedRecord("CAN-ASCII", None, (can_id, data_len, data_bytes), None, line)
     except (ValueError, IndexError):
-        return f"[CAN-ASCII MAL FORMADO] {line}\n"
+        return DecodedRecord("CAN-ASCII", None, None, "CAN-ASCII MAL FORMADO", line)
 
 
-def parse_json_line(line: str) -> str:
+def render_can_ascii(record: DecodedRecord) -> str:
+    if record.status: return f"[{record.status}] {record.raw}\n"
+    can_id, data_len, data_bytes = record.fields
+    return (f"--- CAN ASCII ---\n"
+            f"  ID:            0x{can_id:03X}\n"
+            f"  DLC:           {data_len}\n"
+            f"  Datos:         {' '.join(f'{b:02X}' for b in data_bytes)}\n"
+            f"-------------------\n")
+
+
+def parse_can_ascii(line: str) -> str:
+    return decode_can_ascii(line).render()
+
+
+def decode_json_line(line: str) -> DecodedRecord:
     line = line.strip()
-    if not line.startswith('{') or not line.endswith('}'): return f"[NO JSON] {line}\n"
+    if not line.startswith('{') or not line.endswith('}'):
+        return DecodedRecord("JSON-line", None, None, "NO JSON", line)
     try:
-        data = json.loads(line)
-        pretty_json = json.dumps(data, indent=2)
-        return f"--- JSON Object ---\n{pretty_json}\n-------------------\n"
+        return DecodedRecord("JSON-line", None, json.loads(line), None, line)
     except json.JSONDecodeError:
-        return f"[JSON MAL FORMADO] {line}\n"
+        return DecodedRecord("JSON-line", None, None, "JSON MAL FORMADO", line)
+
+
+def render_json_line(record: DecodedRecord) -> str:
+    if record.status: return f"[{record.status}] {record.raw}\n"
+    pretty_json = json.dumps(record.fields, indent=2)
+    return f"--- JSON Object ---\n{pretty_json}\n-------------------\n"
+
+
+def parse_json_line(line: str) -> str:
+    return decode_json_line(line).render()
+
+
+RECORD_RENDERERS: Dict[str, Callable[[DecodedRecord], str]] = {
+    "NMEA-0183": render_nmea_sentence,
+    "Modbus-RTU": render_modbus_rtu,
+    "CAN-ASCII": render_can_ascii,
+    "JSON-line": render_json_line
+}
+
+
+class PortLineState:
+    # Estado de texto de un puerto en el visor y la consola: decoder incremental y fin de línea pendiente.
+    # skip_lf: el bloque anterior acabó en CR, así que un LF al principio del siguiente es parte del mismo CR+LF.
+    __slots__ = ('decoder', 'skip_lf')
+
+    def __init__(self, encoding: str):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.skip_lf = False
+
+
+class LineFramer:
+    # Corte incremental en líneas en el dominio de bytes. Los bloques se acumulan en un bytearray y solo se busca
+    # b'\n' en lo recién llegado (scan_pos); cuando hay líneas completas se decodifican y separan de una vez, en C,
+    # en lugar de concatenar str y partir línea a línea. batch_start_ns es la hora de llegada de la primera línea del
+    # lote (empezó en un bloque anterior); las demás empezaron en el bloque actual.
+    # Sirve para codificaciones en las que el byte 0x0A siempre es '\n' (utf-8, ascii, latin-1, cp1252...); con el
+    # resto (utf-16...) se decodifica antes y se corta sobre el texto recodificado en utf-8.
+    __slots__ = ('buffer', 'scan_pos', 'line_start_ns', 'batch_start_ns', 'encoding', 'text_decoder')
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self.buffer = bytearray()
+        self.scan_pos = 0
+        self.line_start_ns: Optional[int] = None
+        self.batch_start_ns: Optional[int] = None
+        self.text_decoder = None
+        self.encoding = encoding
+        if '\n'.encode(encoding) != b'\n':
+            self.text_decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            self.encoding = 'utf-8'
+
+    def feed(self, data: Union[bytes, bytearray, memoryview], wall_ns: Optional[int] = None) -> List[str]:
+        buffer = self.buffer
+        # Una línea empieza con su primer byte, aunque sea parte de un carácter que llega partido
+        if not buffer and not (self.text_decoder and self.text_decoder.getstate()[0]): self.line_start_ns = wall_ns
+        if self.text_decoder: data = self.text_decoder.decode(data).encode('utf-8')
+        buffer += data
+        end = buffer.rfind(b'\n', self.scan_pos)
+        if end < 0:
+            self.scan_pos = len(buffer)
+            return []
+        lines = buffer[:end].decode(self.encoding, errors='replace').split('\n')
+        del buffer[:end + 1]
+        # Lo que queda no tiene ningún '\n' (se cortó por el último) y empezó en este bloque
+        self.scan_pos = len(buffer)
+        self.batch_start_ns = self.line_start_ns
+        self.line_start_ns = wall_ns
+        return lines
+
+    def pending(self) -> str:
+        # Línea a medias al cerrar; queda vacía
+        text = self.buffer.decode(self.encoding, errors='replace')
+        self.buffer.clear()
+        self.scan_pos = 0
+        return text
+
+    @staticmethod
+    def join(lines: List[str], first_prefix: str, prefix: str) -> str:
+        # Un único str para todo el lote, cada línea con su prefijo (hora, puerto) y su '\n'
+        return first_prefix + ('\n' + prefix).join(lines) + '\n'
+
+
+class Decoder:
+    # Interfaz estable para decodificadores, también de terceros: un entry point del grupo
+    # DecoderRegistry.ENTRY_POINT_GROUP que apunte a una subclase. Cada captura crea una instancia por puerto,
+    # así que puede guardar estado entre lotes. FRAMING indica qué recibe decode_batch():
+    #   "line"    líneas de texto ya decodificadas, cada una con su \n
+    #   "stream"  bloques de bytes tal como llegan; el entramado lo hace el propio decoder
+    #   "frame"   bloques cortados por silencio en la línea (t3.5 de Modbus RTU, aplicado en el hilo lector)
+    # Los registros devueltos llevan protocol = nombre del decoder; render() los convierte a texto.
+    # STATELESS: cada lote se decodifica sin depender de los anteriores, así que puede repartirse entre procesos.
+    FRAMING = "line"
+    STATELESS = False
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def decode_batch(self, frames: List[Any]) -> List[DecodedRecord]:
+        raise NotImplementedError
+
+    def flush(self) -> List[DecodedRecord]:
+        return []
+
+    @staticmethod
+    def render(record: DecodedRecord) -> str:
+        return f"[{record.protocol}] {record.status or record.type or ''} {record.fields!r}\n"
+
+
+class LineDecoder(Decoder):
+    # Adapta una función línea -> DecodedRecord (NMEA, CAN-ASCII, JSON...)
+    STATELESS = True
+
+    def __init__(self, name: str, decode_line: Callable[[str], DecodedRecord]):
+        super().__init__(name)
+        self.decode_line = decode_line
+
+    def decode_batch(self, frames: List[str]) -> List[DecodedRecord]:
+        return [self.decode_line(line) for line in frames]
+
+
+class ModbusRtuDecoder(Decoder):
+    FRAMING = "frame"
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.stream = ModbusRtuStreamParser()
+
+    def decode_batch(self, frames: List[Union[memoryview, bytes]]) -> List[DecodedRecord]:
+        return [decode_modbus_rtu(frame.data, frame.kind) for data in frames for frame in self.stream.feed(data)]
+
+    def flush(self) -> List[DecodedRecord]:
+        return [decode_modbus_rtu(frame.data, frame.kind) for frame in self.stream.flush()]
+
+    render = staticmethod(render_modbus_rtu)
+
+
+class DecoderRegistry:
+    # Decodificadores disponibles por nombre. Los de terceros se descubren por entry points leyendo solo los
+    # metadatos de los paquetes instalados; su módulo no se importa hasta que se usa por primera vez.
+    ENTRY_POINT_GROUP = "serial_logger_deluxe.decoders"
+
+    def __init__(self):
+        self._decoders: Dict[str, Tuple[Callable[[str], Decoder], str]] = {}
+        self._entry_points: Optional[Dict[str, Any]] = None
+
+    def register(self, name: str, factory: Callable[[str], Decoder], framing: str = "line",
+                 renderer: Optional[Callable[[DecodedRecord], str]] = None) -> None:
+        self._decoders[name] = (factory, framing)
+        if renderer: RECORD_RENDERERS[name] = renderer
+
+    def _discover(self) -> Dict[str, Any]:
+        if self._entry_points is None:
+            try:
+                from importlib.metadata import entry_points
+                try:
+                    found = entry_points(group=self.ENTRY_POINT_GROUP)
+                except TypeError:  # Python < 3.10
+                    found = entry_points().get(self.ENTRY_POINT_GROUP, [])
+            except ImportError:  # Python 3.7
+                found = []
+            self._entry_points = {ep.name: ep for ep in found if ep.name not in self._decoders}
+        return self._entry_points
+
+    def names(self) -> List[str]:
+        return list(self._decoders) + sorted(self._discover())
+
+    def _load(self, name: Optional[str]) -> Optional[Tuple[Callable[[str], Decoder], str]]:
+        if name in self._decoders: return self._decoders[name]
+        entry_point = self._discover().get(name)
+        if entry_point is None: return None
+        try:
+            decoder_class = entry_point.load()
+        except Exception as e:
+            print(f"No se pudo cargar el decodificador '{name}': {e}")
+            return None
+        self.register(name, decoder_class, getattr(decoder_class, 'FRAMING', "line"),
+                      getattr(decoder_class, 'render', None))
+        return self._decoders[name]
+
+    def framing(self, name: Optional[str]) -> Optional[str]:
+        entry = self._load(name)
+        return entry[1] if entry else None
+
+    def create(self, name: str) -> Optional[Decoder]:
+        entry = self._load(name)
+        return entry[0](name) if entry else None
+
+
+DECODER_REGISTRY = DecoderRegistry()
+DECODER_REGISTRY.register("NMEA-0183", lambda name: LineDecoder(name, decode_nmea_sentence))
+DECODER_REGISTRY.register("Modbus-RTU", ModbusRtuDecoder, "frame")
+DECODER_REGISTRY.register("CAN-ASCII", lambda name: LineDecoder(name, decode_can_ascii))
+DECODER_REGISTRY.register("JSON-line", lambda name: LineDecoder(name, decode_json_line))
+
+
+class DecoderSession:
+    # Una captura con un decodificador: un Decoder por puerto, alimentado según su framing
+    def __init__(self, name: str, encoding: str, port_names: List[str]):
+        self.name = name
+        self.encoding = encoding
+        self.port_names = port_names
+        self.decoders: Dict[int, Optional[Decoder]] = {}
+        self.framers: Dict[int, LineFramer] = {}
+
+    def stamp(self, records: List[DecodedRecord], port_id: int, wall_ns: Optional[int]) -> List[DecodedRecord]:
+        for record in records:
+            record.timestamp = wall_ns
+            if len(self.port_names) > 1: record.port = self.port_names[port_id]
+        return records
+
+    def split(self, chunk: "Chunk") -> Tuple[Optional[Decoder], List[Any]]:
+        # Entramado según el framing del decoder: líneas completas o el bloque tal cual
+        if chunk.direction == Chunk.EVENT:
+            # Un aviso de desconexión/reconexión no es dato del cable: no se decodifica, y lo que quedaba a medias
+            # en ese puerto se descarta para no unirlo con lo que llegue después del corte
+            self.decoders.pop(chunk.port_id, None)
+            self.framers.pop(chunk.port_id, None)
+            return None, []
+        if chunk.port_id not in self.decoders: self.decoders[chunk.port_id] = DECODER_REGISTRY.create(self.name)
+        decoder = self.decoders[chunk.port_id]
+        if decoder is None: return None, []
+        if decoder.FRAMING != "line": return decoder, [chunk.data]
+        framer = self.framers.get(chunk.port_id)
+        if framer is None: framer = self.framers[chunk.port_id] = LineFramer(self.encoding)
+        return decoder, [line + '\n' for line in framer.feed(chunk.data)]
+
+    def feed(self, chunk: "Chunk", confirm: Optional[Callable[["Chunk"], bool]] = None) -> List[DecodedRecord]:
+        # confirm: comprobación posterior de una suscripción con pérdidas; si falla, los datos se sobrescribieron
+        # mientras se decodificaban y los registros se descartan
+        decoder, frames = self.split(chunk)
+        records = decoder.decode_batch(frames) if frames else []
+        if confirm and not confirm(chunk): return []
+        return self.stamp(records, chunk.port_id, chunk.wall_ns)
+
+    def flush(self) -> List[DecodedRecord]:
+        records: List[DecodedRecord] = []
+        for port_id, decoder in self.decoders.items():
+            if decoder: records += self.stamp(decoder.flush(), port_id, None)
+        return records
+
+
+# (port_id, wall_ns, líneas) de un bloque recibido
+DecodeSegment = Tuple[int, Optional[int], List[Any]]
+_WORKER_DECODERS: Dict[str, Optional[Decoder]] = {}
+
+
+def _decode_in_worker(name: str, segments: List[DecodeSegment]) -> List[Tuple[int, Optional[int], List[Any]]]:
+    # Se ejecuta en un proceso del pool: un decoder por proceso, reutilizado entre lotes
+    if name not in _WORKER_DECODERS: _WORKER_DECODERS[name] = DECODER_REGISTRY.create(name)
+    decoder = _WORKER_DECODERS[name]
+    return [(port_id, wall_ns, decoder.decode_batch(frames) if decoder else [])
+            for port_id, wall_ns, frames in segments]
+
+
+class ParallelDecodeStage:
+    # Decodificación en un pool de procesos para decodificadores sin estado (p. ej. telemetría JSON a mucha
+    # velocidad). Las líneas se agrupan en lotes para amortizar el IPC y los resultados se entregan en el orden
+    # en que llegaron los datos, aunque los procesos terminen desordenados.
+    BATCH_LINES = 512
+
+    def __init__(self, session: DecoderSession, workers: int):
+        self.session = session
+        # "spawn" y no fork: el pool se crea con los hilos de Tk, lector, log y captura en marcha, y un proceso
+        # hijo de fork heredaría los locks que tuviera cualquiera de ellos en ese instante (p. ej. el de stdout)
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.max_in_flight = workers * 4
+        self.in_flight: Deque[Future] = deque()
+        self.segments: List[DecodeSegment] = []
+        self.pending_lines = 0
+
+    def feed(self, chunk: "Chunk", confirm: Optional[Callable[["Chunk"], bool]] = None) -> List[DecodedRecord]:
+        # Las tramas esperan al lote fuera del RingBuffer: se copian las que aún son vistas
+        _, frames = self.session.split(chunk)
+        frames = [bytes(frame) if isinstance(frame, memoryview) else frame for frame in frames]
+        if frames and (not confirm or confirm(chunk)):
+            self.segments.append((chunk.port_id, chunk.wall_ns, frames))
+            self.pending_lines += len(frames)
+            if self.pending_lines >= self.BATCH_LINES: self.submit()
+        return self.collect()
+
+    def submit(self) -> None:
+        # Envía el lote a medias; con demasiados lotes en vuelo se espera al más antiguo (contrapresión)
+        if not self.segments: return
+        if len(self.in_flight) >= self.max_in_flight: wait_futures([self.in_flight[0]])
+        self.in_flight.append(self.executor.submit(_decode_in_worker, self.session.name, self.segments))
+        self.segments = []
+        self.pending_lines = 0
+
+    def collect(self, block: bool = False) -> List[DecodedRecord]:
+        records: List[DecodedRecord] = []
+        while self.in_flight and (block or self.in_flight[0].done()):
+            future = self.in_flight.popleft()
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Error en el proceso de decodificación: {e}")
+                continue
+            for port_id, wall_ns, batch in results: records += self.session.stamp(batch, port_id, wall_ns)
+        return records
+
+    def flush(self) -> List[DecodedRecord]:
+        self.submit()
+        records = self.collect(block=True)
+        self.executor.shutdown()
+        return records
+
+
+class TimeIndex:
+    # Índice lateral <log>.tidx para ir a una hora sin recorrer el log: entradas <i64 wall_ns> <u64 offset> en orden
+    # de escritura, una cada INDEX_BYTES bytes o cada INDEX_INTERVAL_NS, siempre al principio de una línea (o de un
+    # registro de captura). Buscar es una bisección sobre el índice proyectado con mmap: O(log n) lecturas.
+    ENTRY = struct.Struct('<qQ')
+    SUFFIX = ".tidx"
+    INDEX_BYTES = 4096
+    INDEX_INTERVAL_NS = 1_000_000_000
+
+    @classmethod
+    def sidecar(cls, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        return path.with_name(path.name + cls.SUFFIX)
+
+    @classmethod
+    def _entry_count(cls, path: Union[str, Path]) -> int:
+        sidecar = cls.sidecar(path)
+        count = sidecar.stat().st_size // cls.ENTRY.size if sidecar.exists() else 0
+        if not count: raise ValueError(f"{Path(path).name} no tiene índice de horas ({sidecar.name})")
+        return count
+
+    @classmethod
+    def first_time(cls, path: Union[str, Path]) -> int:
+        cls._entry_count(path)
+        with open(cls.sidecar(path), 'rb') as f:
+            return cls.ENTRY.unpack(f.read(cls.ENTRY.size))[0]
+
+    @classmethod
+    def seek(cls, path: Union[str, Path], wall_ns: int) -> int:
+        # Offset de la última entrada con hora <= wall_ns; 0 si la hora es anterior a todo el log
+        count = cls._entry_count(path)
+        with open(cls.sidecar(path), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as entries:
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                if cls.ENTRY.unpack_from(entries, middle * cls.ENTRY.size)[0] <= wall_ns:
+                    low = middle + 1
+                else:
+                    high = middle
+            return cls.ENTRY.unpack_from(entries, (low - 1) * cls.ENTRY.size)[1] if low else 0
+
+    @staticmethod
+    def parse_time(text: str, reference_ns: int) -> int:
+        # "2026-10-16 03:12:40", ISO 8601 o solo "03:12:40[.fff]" (se toma el día de reference_ns); hora local
+        text = text.strip()
+        try:
+            moment = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            clock = datetime.time.fromisoformat(text)
+            moment = datetime.datetime.combine(datetime.datetime.fromtimestamp(reference_ns / 1_000_000_000).date(),
+                                               clock)
+        return int(moment.timestamp() * 1_000_000_000)
+
+
+class LogCompressor:
+    # Hilo de fondo para los segmentos ya rotados: los comprime (gzip/xz) y aplica el límite de espacio total.
+    # El escritor solo encola la ruta, así que ni la compresión ni los borrados frenan el camino de escritura.
+    FORMATS: Dict[str, Tuple[Callable[..., Any], str]] = {"gzip": (gzip.open, ".gz"), "xz": (lzma.open, ".xz")}
+    COPY_BLOCK = 1 << 20
+
+    def __init__(self, path: Path, compression: str = "none", retain_bytes: int = 0):
+        self.path = path
+        self.compression = compression if compression in self.FORMATS else "none"
+        self.retain_bytes = retain_bytes
+        # Segmentos de este log: <nombre>.AAAAMMDD-HHMMSS[-n]<sufijo>[.gz|.xz]
+        self.segment_re = re.compile(rf"{re.escape(path.stem)}\.\d{{8}}-\d{{6}}(-\d+)?{re.escape(path.suffix)}"
+                                     rf"(\.gz|\.xz)?")
+        self.jobs: "queue.Queue[Optional[Path]]" = queue.Queue()
+        self.thread = threading.Thread(target=self._compress_task, daemon=True)
+        self.thread.start()
+        # Segmentos que una ejecución anterior dejó sin comprimir (cierre abrupto)
+        if self.compression != "none":
+            for segment in self.segments():
+                if segment.suffix == path.suffix: self.submit(segment)
+
+    def segments(self) -> List[Path]:
+        try:
+            found = [entry for entry in self.path.parent.iterdir() if self.segment_re.fullmatch(entry.name)]
+        except OSError:
+            return []
+        return sorted(found, key=lambda entry: (entry.stat().st_mtime_ns, entry.name))
+
+    def submit(self, segment: Optional[Path]) -> None:
+        self.jobs.put(segment)
+
+    def close(self) -> None:
+        # Termina lo pendiente antes de salir para no dejar archivos .tmp a medias
+        self.submit(None)
+        self.thread.join()
+
+    def _compress_task(self):
+        while True:
+            segment = self.jobs.get()
+            try:
+                if segment is not None and self.compression != "none": self._compress(segment)
+                # Con segmentos aún por comprimir en cola, el total no es el definitivo
+                if segment is None or self.jobs.empty(): self._enforce_retention()
+            except OSError as e:
+                print(f"Error al comprimir o purgar los segmentos de log: {e}")
+            if segment is None: break
+
+    def _compress(self, segment: Path) -> None:
+        if not segment.exists(): return
+        opener, extension = self.FORMATS[self.compression]
+        target = segment.with_name(segment.name + extension)
+        partial = target.with_name(target.name + ".tmp")
+        with open(segment, 'rb') as source, opener(partial, 'wb') as sink:
+            shutil.copyfileobj(source, sink, self.COPY_BLOCK)
+        # Se conserva la fecha del segmento: la retención ordena por antigüedad
+        stat = segment.stat()
+        os.utime(partial, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(partial, target)
+        segment.unlink()
+        # Los offsets del índice de horas no valen para el archivo comprimido
+        TimeIndex.sidecar(segment).unlink(missing_ok=True)
+
+    def _enforce_retention(self) -> None:
+        # Se borran los segmentos más antiguos hasta que el total (incluido el archivo activo) cabe en retain_bytes
+        if not self.retain_bytes: return
+        segments = [(segment, segment.stat().st_size) for segment in self.segments()]
+        total = sum(size for _, size in segments) + (self.path.stat().st_size if self.path.exists() else 0)
+        for segment, size in segments:
+            if total <= self.retain_bytes: break
+            segment.unlink()
+            TimeIndex.sidecar(segment).unlink(missing_ok=True)
+            total -= size
+
+
+class LogWriter:
+    # Destino del log con buffer propio: en lugar de un flush por línea, se vuelca al disco cada flush_bytes bytes,
+    # cada flush_ms milisegundos o cuando el consumidor queda ocioso (idle). fsync_ms > 0 fuerza además un fsync
+    # periódico para que un corte de corriente no se lleve más de ese intervalo de datos.
+    # Con rotate_bytes/rotate_seconds el archivo se renombra (os.replace, atómico) a un segmento con la hora de inicio
+    # y se abre uno nuevo; la compresión y la retención (retain_bytes) las hace un LogCompressor en segundo plano.
+    # header se escribe al abrir cada segmento (la captura binaria lo usa para su registro de sesión).
+    # time_index=True mantiene junto a cada segmento su índice de horas (TimeIndex), con las marcas que se pasan
+    # como wall_ns en write()/write_bytes().
+    ROTATE_RETRY_S = 5.0  # s; si el renombrado falla (p. ej. archivo abierto por otro proceso en Windows)
+
+    def __init__(self, path: Union[str, Path], flush_bytes: int = 64 * 1024, flush_ms: int = 1000,
+                 flush_on_idle: bool = True, fsync_ms: int = 0, rotate_bytes: int = 0, rotate_seconds: int = 0,
+                 compression: str = "none", retain_bytes: int = 0, header: bytes = b"", time_index: bool = False):
+        self.path = Path(path)
+        self.header = header
+        self.time_index = time_index
+        self.index_file: Optional[io.FileIO] = None
+        self.index_pending: List[Tuple[int, int]] = []
+        self.index_last: Optional[Tuple[int, int]] = None
+        self.bytes_written = 0
+        self.flush_bytes = max(1, int(flush_bytes))
+        self.flush_interval = max(0, int(flush_ms)) / 1000
+        self.flush_on_idle = flush_on_idle
+        self.fsync_interval = max(0, int(fsync_ms)) / 1000
+        self.rotate_bytes = max(0, int(rotate_bytes))
+        self.rotate_interval = max(0, int(rotate_seconds))
+        self.compressor: Optional[LogCompressor] = None
+        if self.rotate_bytes or self.rotate_interval:
+            self.compressor = LogCompressor(self.path, compression, max(0, int(retain_bytes)))
+        self._open()
+        self.buffer = bytearray()
+        self.buffer_since = 0.0
+        self.last_fsync = time.monotonic()
+        self.flush_count = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+        self.fsync_count = 0
+        self.fsync_time_max = 0.0
+        self.rotation_count = 0
+        self.rotation_failures = 0
+        self.rotation_error = ""
+        self.rotation_retry = 0.0
+
+    def _open(self, resume: bool = False) -> None:
+        # resume=True reabre el mismo segmento tras una rotación fallida: sin cabecera nueva ni reiniciar su hora
+        self.file = open(self.path, 'ab', buffering=0)
+        self.segment_bytes = os.fstat(self.file.fileno()).st_size
+        if self.header and not resume:
+            self._write_all(self.header)
+            self.segment_bytes += len(self.header)
+        if self.time_index:
+            self.index_file = open(TimeIndex.sidecar(self.path), 'ab', buffering=0)
+            self.index_last = None
+        if resume: return
+        self.segment_started = datetime.datetime.now()
+        self.next_rotation: Optional[float] = None
+        if self.rotate_interval:
+            # Los cortes por tiempo caen en múltiplos del intervalo según la hora local (cada hora en punto, etc.)
+            offset = self.segment_started.astimezone().utcoffset().total_seconds()
+            local = time.time() + offset
+            self.next_rotation = (local // self.rotate_interval + 1) * self.rotate_interval - offset
+
+    def write(self, text: str, wall_ns: Optional[int] = None) -> None:
+        self.write_bytes(text.encode('utf-8'), wall_ns=wall_ns)
+
+    def write_bytes(self, *parts: Union[bytes, bytearray, memoryview], wall_ns: Optional[int] = None) -> None:
+        # Las partes de una misma llamada nunca quedan repartidas entre dos segmentos
+        if not self.buffer: self.buffer_since = time.monotonic()
+        if wall_ns is not None and self.index_file:
+            # Entrada de índice cada INDEX_BYTES bytes o INDEX_INTERVAL_NS, siempre al principio de una escritura
+            position = self.bytes_written + len(self.buffer)
+            last = self.index_last
+            if last is None or position - last[1] >= TimeIndex.INDEX_BYTES or \
+                    wall_ns - last[0] >= TimeIndex.INDEX_INTERVAL_NS:
+                self.index_pending.append((wall_ns, len(self.buffer)))
+                self.index_last = (wall_ns, position)
+        for part in parts: self.buffer += part
+        if len(self.buffer) >= self.flush_bytes: self.flush()
+
+    def timeout(self) -> Optional[float]:
+        # Tiempo máximo que el consumidor puede esperar datos antes de que toque volcar por intervalo
+        if not self.buffer or not self.flush_interval: return None
+        return max(0.0, self.buffer_since + self.flush_interval - time.monotonic())
+
+    def poll(self, idle: bool = False) -> None:
+        # Lo llama el consumidor tras cada lote; idle=True si la cola de entrada quedó vacía
+        if not self.buffer:
+            if self._rotation_due(): self.rotate()
+            return
+        if (idle and self.flush_on_idle) or (self.flush_interval and self.timeout() == 0): self.flush()
+
+    def _rotation_due(self) -> bool:
+        if self.segment_bytes <= len(self.header) or time.monotonic() < self.rotation_retry: return False
+        if self.rotate_bytes and self.segment_bytes >= self.rotate_bytes: return True
+        return self.next_rotation is not None and time.time() >= self.next_rotation
+
+    def flush(self) -> None:
+        if not self.buffer: return
+        # Un corte por tiempo se aplica antes de escribir: los datos nuevos van ya al segmento siguiente
+        if self._rotation_due(): self.rotate()
+        start = time.perf_counter()
+        base = self.segment_bytes
+        written = self._write_all(self.buffer)
+        self.bytes_written += written
+        self.segment_bytes += written
+        self.buffer.clear()
+        if self.index_pending:
+            # El índice se escribe después de los datos: nunca apunta a bytes que aún no están en el log
+            entries = b''.join(TimeIndex.ENTRY.pack(wall_ns, base + offset) for wall_ns, offset in self.index_pending)
+            self.index_pending.clear()
+            view = memoryview(entries)
+            while view: view = view[self.index_file.write(view):]
+        elapsed = time.perf_counter() - start
+        self.flush_count += 1
+        self.flush_time_total += elapsed
+        self.flush_time_max = max(self.flush_time_max, elapsed)
+        if self.fsync_interval and time.monotonic() - self.last_fsync >= self.fsync_interval: self.fsync()
+        if self._rotation_due(): self.rotate()
+
+    def _write_all(self, data: Union[bytes, bytearray]) -> int:
+        view = memoryview(data)
+        written = 0
+        while written < len(view):
+            written += self.file.write(view[written:])
+        view.release()
+        return written
+
+    def fsync(self) -> None:
+        start = time.perf_counter()
+        os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic()
+        self.fsync_count += 1
+        self.fsync_time_max = max(self.fsync_time_max, time.perf_counter() - start)
+
+    def rotate(self) -> None:
+        # Solo renombrar y reabrir ocurre en el hilo que escribe; el resto es trabajo del LogCompressor
+        if self.fsync_interval: self.fsync()
+        self.file.close()
+        if self.index_file: self.index_file.close()
+        stamp = self.segment_started.strftime('%Y%m%d-%H%M%S')
+        segment = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        n = 1
+        while any(candidate.exists() for candidate in (segment, segment.with_name(segment.name + ".gz"),
+                                                       segment.with_name(segment.name + ".xz"))):
+            segment = self.path.with_name(f"{self.path.stem}.{stamp}-{n}{self.path.suffix}")
+            n += 1
+        try:
+            os.replace(self.path, segment)
+        except OSError as error:
+            # Una rotación fallida no corta el log: se sigue en el mismo archivo y se reintenta más tarde
+            self._open(resume=True)
+            self.rotation_failures += 1
+            self.rotation_error = str(error)
+            self.rotation_retry = time.monotonic() + self.ROTATE_RETRY_S
+            return
+        if self.index_file:
+            try:
+                os.replace(TimeIndex.sidecar(self.path), TimeIndex.sidecar(segment))
+            except OSError:
+                # El segmento queda sin índice; el viejo junto al archivo nuevo apuntaría a offsets que no existen
+                try:
+                    os.remove(TimeIndex.sidecar(self.path))
+                except OSError:
+                    pass
+        self._open()
+        self.rotation_count += 1
+        if self.compressor: self.compressor.submit(segment)
+
+    def close(self) -> None:
+        if self.file.closed: return
+        try:
+            self.flush()
+            if self.fsync_interval: self.fsync()
+        finally:
+            self.file.close()
+            if self.index_file: self.index_file.close()
+            if self.compressor: self.compressor.close()
+
+    def stats_text(self) -> str:
+        average = self.flush_time_total / self.flush_count * 1000 if self.flush_count else 0.0
+        text = (f"{self.flush_count} volcados ({self.bytes_written} B), latencia media {average:.2f} ms, "
+                f"máx. {self.flush_time_max * 1000:.2f} ms")
+        if self.fsync_interval: text += f", {self.fsync_count} fsync (máx. {self.fsync_time_max * 1000:.2f} ms)"
+        if self.rotation_count: text += f", {self.rotation_count} rotaciones"
+        if self.rotation_failures: text += f", {self.rotation_failures} rotaciones fallidas ({self.rotation_error})"
+        return text
+
+
+class CaptureWriter:
+    # Captura binaria sin pérdidas (.slcap): los bytes tal cual pasaron por el cable, en registros con prefijo de
+    # longitud  <u32 longitud> <u64 mono_ns> <u8 dirección> <u8 port_id> <datos>.  Cada segmento (y cada sesión
+    # añadida a un archivo existente) empieza por un registro SESSION con MAGIC + JSON: nombres de los puertos y el
+    # ancla wall_offset_ns para pasar mono_ns a hora de reloj. El buffer, el fsync y la rotación son los de LogWriter.
+    RECORD = struct.Struct('<IQBB')
+    MAGIC = b"SLCAP1"
+    SESSION = 0xFF
+    VERSION = 1
+    MAX_RECORD = 1 << 24  # Tope de datos por registro; el lector rechaza longitudes mayores (archivo dañado o ajeno)
+
+    def __init__(self, path: Union[str, Path], port_names: List[str], wall_offset_ns: int, **policy):
+        info = {'version': self.VERSION, 'ports': port_names, 'wall_offset_ns': wall_offset_ns}
+        session = self.MAGIC + json.dumps(info).encode('utf-8')
+        header = self.RECORD.pack(len(session), time.monotonic_ns(), self.SESSION, 0) + session
+        self.writer = LogWriter(path, header=header, **policy)
+        self.record_count = 0
+
+    def write_chunk(self, chunk: "Chunk") -> None:
+        view = memoryview(chunk.data)
+        for start in range(0, max(len(view), 1), self.MAX_RECORD):
+            data = view[start:start + self.MAX_RECORD]
+            self.writer.write_bytes(self.RECORD.pack(len(data), chunk.mono_ns, chunk.direction, chunk.port_id), data,
+                                    wall_ns=chunk.wall_ns)
+            self.record_count += 1
+
+    def timeout(self) -> Optional[float]:
+        return self.writer.timeout()
+
+    def poll(self, idle: bool = False) -> None:
+        self.writer.poll(idle)
+
+    def close(self) -> None:
+        self.writer.close()
+
+    def stats_text(self) -> str:
+        return f"{self.record_count} registros, {self.writer.stats_text()}"
+
+
+class CaptureReader:
+    # Recorre una captura .slcap y devuelve los registros como Chunk (data en bytes, wall_ns ya calculado).
+    # Un último registro incompleto (corte de corriente) se ignora y queda contado en truncated_bytes. Un archivo que
+    # no empieza por un registro SESSION o una longitud imposible lanzan ValueError en cuanto se lee la cabecera.
+    BLOCK_SIZE = 1 << 20
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.port_names: List[str] = []
+        self.wall_offset_ns = 0
+        self.sessions = 0
+        self.truncated_bytes = 0
+
+    def __iter__(self) -> Iterator["Chunk"]:
+        record = CaptureWriter.RECORD
+        with open(self.path, 'rb') as f:
+            buffer = bytearray()
+            for block in iter(lambda: f.read(self.BLOCK_SIZE), b''):
+                buffer += block
+                pos = 0
+                while len(buffer) - pos >= record.size:
+                    length, mono_ns, direction, port_id = record.unpack_from(buffer, pos)
+                    self._check_record(length, direction, f.tell() - len(buffer) + pos)
+                    end = pos + record.size + length
+                    if end > len(buffer): break
+                    data = bytes(buffer[pos + record.size:end])
+                    pos = end
+                    if direction == CaptureWriter.SESSION:
+                        self._start_session(data)
+                        continue
+                    yield Chunk(data, mono_ns, mono_ns + self.wall_offset_ns, port_id, direction=direction)
+                del buffer[:pos]
+            self.truncated_bytes = len(buffer)
+
+    def read_session(self) -> None:
+        # Solo la cabecera (puertos y ancla de reloj), sin recorrer el archivo
+        record = CaptureWriter.RECORD
+        with open(self.path, 'rb') as f:
+            head = f.read(record.size)
+            length, _, direction, _ = record.unpack(head) if len(head) == record.size else (0, 0, None, 0)
+            self._check_record(length, direction, 0)
+            self._apply_session(f.read(length))
+
+    def _check_record(self, length: int, direction: Optional[int], offset: int) -> None:
+        if not self.sessions and direction != CaptureWriter.SESSION:
+            raise ValueError(f"{self.path} no es una captura de SerialLogger")
+        if length > CaptureWriter.MAX_RECORD:
+            raise ValueError(f"{self.path}: registro de {length} bytes en el byte {offset}; captura dañada")
+
+    def _apply_session(self, data: bytes) -> None:
+        if not data.startswith(CaptureWriter.MAGIC): raise ValueError(f"{self.path}: registro de sesión no válido")
+        info = json.loads(data[len(CaptureWriter.MAGIC):].decode('utf-8'))
+        self.port_names = info.get('ports', [])
+        self.wall_offset_ns = info.get('wall_offset_ns', 0)
+
+    def _start_session(self, data: bytes) -> None:
+        self._apply_session(data)
+        self.sessions += 1
+
+
+def export_capture_text(reader: CaptureReader, out: Union[LogWriter, io.TextIOBase], timestamp: str = "none",
+                        delimiter: str = " ", encoding: str = 'utf-8') -> int:
+    # El log de texto como vista derivada de la captura: mismas líneas que escribe el logger, con la hora de llegada
+    # del bloque en el que empezó cada una; lo enviado va aparte y se marca con "TX". Devuelve las líneas escritas.
+    framers: Dict[Tuple[int, bool], LineFramer] = {}
+    tags: Dict[Tuple[int, bool], str] = {}
+    line_count = 0
+
+    def line_tag(port_id: int, sent: bool) -> str:
+        names = reader.port_names
+        parts = [names[port_id]] if len(names) > 1 and port_id < len(names) else []
+        if sent: parts.append("TX")
+        return f"[{' '.join(parts)}] " if parts else ""
+
+    def flush_pending() -> int:
+        # Una línea sin terminar no continúa en la sesión siguiente (otra conexión, otros puertos)
+        count = 0
+        for key, framer in framers.items():
+            start_ns = framer.line_start_ns
+            line = framer.pending().strip()
+            if line:
+                out.write(f"{get_timestamp(timestamp, delimiter, start_ns)}{tags[key]}{line}\n")
+                count += 1
+        framers.clear()
+        return count
+
+    session = 0
+    for chunk in reader:
+        if reader.sessions != session:
+            line_count += flush_pending()
+            session = reader.sessions
+        key = (chunk.port_id, chunk.direction == Chunk.TX)
+        framer = framers.get(key)
+        if framer is None:
+            framer = framers[key] = LineFramer(encoding)
+            tags[key] = line_tag(*key)
+        lines = framer.feed(chunk.data, chunk.wall_ns)
+        if not lines: continue
+        first_prefix = get_timestamp(timestamp, delimiter, framer.batch_start_ns) + tags[key]
+        prefix = get_timestamp(timestamp, delimiter, chunk.wall_ns) + tags[key]
+        out.write(LineFramer.join(lines, first_prefix, prefix))
+        line_count += len(lines)
+    line_count += flush_pending()
+    return line_count
+
+
+def capture_task(subscription: "Subscription", capture: CaptureWriter) -> None:
+    # Consumidor de la suscripción de captura (tx=True); lo usan tanto la GUI como la CLI
+    print("Hilo de captura iniciado.")
+    try:
+        while not subscription.closed:
+            for chunk in subscription.get_batch(timeout=capture.timeout()): capture.write_chunk(chunk)
+            capture.poll(idle=subscription.queue.empty())
+        capture.close()
+    except OSError as e:
+        print(f"Error al escribir la captura: {e}");
+        subscription.close(discard=True)
+        try:
+            capture.close()
+        except OSError:
+            pass
+    if subscription.lost_bytes:
+        print(f"Aviso: la captura perdió {subscription.lost_bytes} bytes (buffer circular desbordado).")
+    print(f"Captura: {capture.stats_text()}")
+    print("Hilo de captura terminado.")
+
+
+class MappedLog:
+    # Acceso a logs de varios GB sin cargarlos: el archivo se proyecta con mmap y un hilo de fondo construye un
+    # índice disperso con las líneas completas que hay antes de cada bloque de BLOCK_SIZE bytes (array 'Q').
+    # Leer una ventana de líneas solo recorre el bloque donde empieza, así que abrir y desplazarse cuesta lo mismo
+    # con 1 MB que con 20 GB. Con follow=True el índice sigue al archivo mientras crece (log en curso).
+    BLOCK_SIZE = 1 << 16
+    FOLLOW_INTERVAL = 0.5
+
+    def __init__(self, path: Union[str, Path], encoding: str = 'utf-8', follow: bool = False):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.follow = follow
+        self.file = open(self.path, 'rb')
+        self.map: Optional[mmap.mmap] = None
+        self.size = 0
+        self.block_lines = array('Q', [0])
+        self.indexed_bytes = 0
+        self.complete = False
+        self.progress = threading.Condition()
+        self.stop_event = threading.Event()
+        self._remap()
+        self.index_thread = threading.Thread(target=self._index_task, daemon=True)
+        self.index_thread.start()
+
+    def _remap(self) -> None:
+        size = os.fstat(self.file.fileno()).st_size
+        # mmap no admite archivos vacíos; el mapa anterior sigue vivo mientras alguien lo esté leyendo
+        if size and size != self.size: self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = size
+
+    def _index_task(self) -> None:
+        while not self.stop_event.is_set():
+            data, size = self.map, self.size
+            position = self.indexed_bytes
+            while position + self.BLOCK_SIZE <= size and not self.stop_event.is_set():
+                lines = data[position:position + self.BLOCK_SIZE].count(b'\n')
+                position += self.BLOCK_SIZE
+                with self.progress:
+                    self.block_lines.append(self.block_lines[-1] + lines)
+                    self.indexed_bytes = position
+                    self.progress.notify_all()
+            with self.progress:
+                self.complete = True
+                self.progress.notify_all()
+            if not self.follow or self.stop_event.wait(self.FOLLOW_INTERVAL): break
+            self._remap()
+
+    def close(self) -> None:
+        self.stop_event.set()
+        self.index_thread.join(timeout=1)
+        self.map = None
+        self.file.close()
+
+    def line_count(self) -> int:
+        # Líneas indexadas más las del último bloque incompleto; un final sin \n también cuenta como línea.
+        # Mientras el índice no llega al último bloque se devuelve la cuenta parcial: nunca se recorre más de un
+        # bloque (se llama desde el hilo de Tk en cada refresco)
+        data, size = self.map, self.size
+        if not size: return 0
+        with self.progress:
+            indexed_lines, indexed = self.block_lines[-1], self.indexed_bytes
+        if size - indexed > self.BLOCK_SIZE: return indexed_lines
+        return indexed_lines + data[indexed:size].count(b'\n') + (data[size - 1] != 0x0A)
+
+    def wait(self, line: Optional[int] = None) -> None:
+        # Bloquea hasta que el índice cubre 'line' (o todo el archivo con line=None); para la CLI
+        with self.progress:
+            while not self.complete and (line is None or self.block_lines[-1] <= line):
+                self.progress.wait()
+
+    def line_offset(self, line: int) -> Optional[int]:
+        if line <= 0: return 0
+        data, size = self.map, self.size
+        if data is None: return None
+        # Último bloque con menos de 'line' saltos antes de su inicio; desde ahí se buscan los que faltan
+        block = bisect.bisect_left(self.block_lines, line) - 1
+        position = block * self.BLOCK_SIZE
+        remaining = line - self.block_lines[block]
+        while remaining:
+            found = data.find(b'\n', position, size)
+            if found < 0: return None
+            position = found + 1
+            remaining -= 1
+        return position if position < size else None
+
+    def line_at_offset(self, offset: int) -> Optional[int]:
+        # Número de la línea que contiene 'offset'; None si el índice todavía no ha llegado a ese bloque
+        block = offset // self.BLOCK_SIZE
+        with self.progress:
+            if block >= len(self.block_lines): return None
+            lines = self.block_lines[block]
+        return lines + self.map[block * self.BLOCK_SIZE:offset].count(b'\n')
+
+    def lines(self, start: int, count: int) -> List[str]:
+        return self.lines_at(self.line_offset(start), count)
+
+    def lines_at(self, begin: Optional[int], count: int) -> List[str]:
+        # Hasta 'count' líneas desde el offset 'begin' (inicio de línea); no necesita el índice de líneas
+        data, size = self.map, self.size
+        if begin is None or begin >= size or count <= 0: return []
+        end = begin
+        for _ in range(count):
+            found = data.find(b'\n', end, size)
+            end = size if found < 0 else found + 1
+            if end >= size: break
+        # Solo '\n' separa líneas, igual que en el índice: splitlines() también corta en CR sueltos (habituales en
+        # datos serie), \x0c, \x1c-\x1e, \x85 o \u2028, y la ventana se desalinearía con la barra de desplazamiento
+        lines = data[begin:end].decode(self.encoding, errors='replace').split('\n')
+        if not lines[-1]: lines.pop()
+        return [line[:-1] if line.endswith('\r') else line for line in lines]
+
+
+class ScrollbackStore:
+    # Historial completo del panel de recepción. El texto ya renderizado se vuelca a un archivo temporal y cada
+    # línea es solo un offset (array 'Q') y un tag (array 'B'); el widget Text mantiene únicamente una ventana.
+    TAGS = ("received", "sent", "error")
+    BLOCK_SIZE = 1 << 20
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.offsets = array('Q', [0])
+        self.line_tags = array('B')
+        self.partial: List[str] = []
+        self.partial_tag: Optional[int] = None
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_tags)
+
+    def append(self, text: str, tag: str) -> None:
+        tag_id = self.TAGS.index(tag) if tag in self.TAGS else 0
+        pieces = text.split('\n')
+        for i, piece in enumerate(pieces):
+            if self.partial_tag is None: self.partial_tag = tag_id
+            self.partial.append(piece)
+            if i == len(pieces) - 1: break
+            data = (''.join(self.partial) + '\n').encode('utf-8')
+            self.file.write(data)
+            self.offsets.append(self.offsets[-1] + len(data))
+            self.line_tags.append(self.partial_tag)
+            self.partial = []
+            self.partial_tag = None
+
+    def lines(self, start: int, end: int) -> List[Tuple[str, str]]:
+        # Líneas completas [start, end) con su tag, cada una terminada en \n
+        self.file.seek(self.offsets[start])
+        data = self.file.read(self.offsets[end] - self.offsets[start])
+        self.file.seek(0, os.SEEK_END)
+        return [(line + '\n', self.TAGS[self.line_tags[start + i]])
+                for i, line in enumerate(data.decode('utf-8').split('\n')[:end - start])]
+
+    def save(self, f: io.TextIOBase) -> None:
+        self.file.seek(0)
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for block in iter(lambda: self.file.read(self.BLOCK_SIZE), b''):
+            f.write(decoder.decode(block))
+        self.file.seek(0, os.SEEK_END)
+        f.write(''.join(self.partial))
+
+    def clear(self) -> None:
+        self.file.seek(0)
+        self.file.truncate()
+        self.offsets = array('Q', [0])
+        self.line_tags = array('B')
+        self.partial = []
+        self.partial_tag = None
+
+
+class ModbusRtuFramer:
+    # Por encima de 19200 baud la especificación Modbus fija t1.5 = 750 us y t3.5 = 1.75 ms
+    FIXED_T15_NS = 750_000
+    FIXED_T35_NS = 1_750_000
+
+    def __init__(self, baud: int, databits: int = 8, parity: str = 'none', stopbits: float = 1):
+        baud = int(baud)
+        bits_per_char = 1 + int(databits) + (0 if parity == 'none' else 1) + float(stopbits)
+        self.char_ns = int(bits_per_char * 1_000_000_000 / baud)
+        if baud > 19200:
+            self.t15_ns, self.t35_ns = self.FIXED_T15_NS, self.FIXED_T35_NS
+        else:
+            self.t15_ns, self.t35_ns = int(1.5 * self.char_ns), int(3.5 * self.char_ns)
+        # La trama en curso se guarda como rango de posiciones del RingBuffer, sin copiar bytes
+        self.frame_start = 0
+        self.frame_end = 0
+        self.first_rx_ns = 0
+        self.last_rx_ns = 0
+        self.t15_violations = 0
+
+    def pending(self) -> bool:
+        return self.frame_end > self.frame_start
+
+    def feed(self, start: int, end: int, arrival_ns: int) -> List[Tuple[int, int, int]]:
+        # arrival_ns es el instante en que el hilo lector recibió el último byte de [start, end); el primero
+        # llegó aproximadamente (end - start) caracteres antes.
+        frames = []
+        if self.pending():
+            gap_ns = arrival_ns - (end - start) * self.char_ns - self.last_rx_ns
+            if gap_ns >= self.t35_ns:
+                frames.append(self._take())
+            elif gap_ns > self.t15_ns:
+                self.t15_violations += 1
+        if not self.pending():
+            self.frame_start = start
+            self.first_rx_ns = arrival_ns
+        self.frame_end = end
+        self.last_rx_ns = arrival_ns
+        return frames
+
+    def poll(self, now_ns: int) -> Optional[Tuple[int, int, int]]:
+        if self.pending() and now_ns - self.last_rx_ns >= self.t35_ns: return self._take()
+        return None
+
+    def _take(self) -> Tuple[int, int, int]:
+        # La trama se marca con la llegada de su primer tramo
+        frame = (self.frame_start, self.frame_end, self.first_rx_ns)
+        self.frame_start = self.frame_end
+        return frame
+
+
+class Chunk:
+    # Bloque de datos recibido. mono_ns se toma en el hilo lector justo al completar la lectura; wall_ns es la
+    # misma marca en hora de reloj (epoch), derivada de un único ancla tomada al abrir el puerto. Si data es una
+    # vista del RingBuffer, ring/ring_pos permiten comprobar que el lector no la ha sobrescrito todavía.
+    # direction: RX (recibido), TX (enviado por nosotros) o EVENT (aviso generado localmente, no pasó por el cable).
+    __slots__ = ('data', 'mono_ns', 'wall_ns', 'port_id', 'ring', 'ring_pos', 'direction')
+    RX, TX, EVENT = 0, 1, 2
+
+    def __init__(self, data: Union[memoryview, bytes], mono_ns: int, wall_ns: int, port_id: int = 0,
+                 ring: Optional["RingBuffer"] = None, ring_pos: int = 0, direction: int = 0):
+        self.data = data
+        self.mono_ns = mono_ns
+        self.wall_ns = wall_ns
+        self.port_id = port_id
+        self.ring = ring
+        self.ring_pos = ring_pos
+        self.direction = direction
+
+    def is_valid(self) -> bool:
+        return self.ring is None or self.ring.is_valid(self.ring_pos)
+
+
+class RingBuffer:
+    # Buffer circular preasignado en el que el hilo lector (único escritor) lee con readinto(). Las posiciones son
+    # lógicas (bytes escritos desde la apertura); el índice físico es posición % capacity.
+    # Los lectores sin pérdidas registran su cursor (primer byte que aún no han terminado de usar) y el escritor
+    # nunca pisa nada por delante del más atrasado: espera a que liberen sitio. Los demás lectores no frenan al
+    # escritor y comprueban con is_valid() que su vista no se ha sobrescrito.
+    DEFAULT_CAPACITY = 1 << 22
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, wall_offset_ns: Optional[int] = None):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.head = 0
+        self.write_limit = 0
+        self.wall_offset_ns = time.time_ns() - time.monotonic_ns() if wall_offset_ns is None else wall_offset_ns
+        self.cursors: Dict[Any, int] = {}
+        self.space = threading.Condition()
+
+    def write_view(self, max_bytes: int, timeout: Optional[float] = None) -> memoryview:
+        # Con lectores sin pérdidas la vista se limita al sitio que han liberado; si no hay ninguno se espera hasta
+        # timeout y se devuelve una vista vacía, para que el hilo lector pueda atender a un cierre
+        start = self.head % self.capacity
+        size = min(self.capacity - start, max_bytes)
+        if self.cursors:
+            with self.space:
+                while self.cursors and self._free() <= 0:
+                    if not self.space.wait(timeout): break
+                if self.cursors: size = max(0, min(size, self._free()))
+        view = self.view[start:start + size]
+        self.write_limit = self.head + len(view)
+        return view
+
+    def _free(self) -> int:
+        return min(self.cursors.values()) + self.capacity - self.head
+
+    def attach(self, reader: Any, position: int) -> None:
+        with self.space:
+            self.cursors.setdefault(reader, position)
+
+    def release(self, reader: Any, position: int) -> None:
+        with self.space:
+            if reader in self.cursors:
+                self.cursors[reader] = position
+                self.space.notify()
+
+    def detach(self, reader: Any) -> None:
+        with self.space:
+            self.cursors.pop(reader, None)
+            self.space.notify()
+
+    def advance(self, count: int) -> None:
+        self.head += count
+
+    def is_valid(self, start: int) -> bool:
+        return start >= self.write_limit - self.capacity
+
+    def span_view(self, start: int, end: int) -> Union[memoryview, bytes]:
+        first, last = start % self.capacity, end % self.capacity
+        if first < last or end == start:
+            return self.view[first:last]
+        if last == 0:
+            return self.view[first:]
+        return bytes(self.view[first:]) + bytes(self.view[:last])
+
+
+class BoundedQueue(queue.Queue):
+    # Cola con capacidad máxima y política de desborde:
+    #   block        el productor espera (sin pérdidas, frena al lector). Los datos del RingBuffer quedan retenidos
+    #                por el cursor de la suscripción; los que van en bytes propios (TX, avisos, reproducción) se
+    #                limitan además a max_bytes, para que la memoria no dependa del tamaño de los bloques
+    #   drop-oldest  se descarta lo más antiguo para hacer sitio
+    #   drop-newest  se descarta lo que llega
+    #   coalesce     se descarta todo lo pendiente y se conserva solo lo más reciente (el visor salta al presente)
+    POLICIES = ("block", "drop-oldest", "drop-newest", "coalesce")
+
+    def __init__(self, maxsize: int = 0, policy: str = "block", max_bytes: int = 0):
+        if policy not in self.POLICIES: raise ValueError(f"Política de cola desconocida: {policy}")
+        super().__init__(maxsize)
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.owned_bytes = 0
+        self.dropped_items = 0
+        self.dropped_bytes = 0
+
+    @staticmethod
+    def _owned_size(item: Any) -> int:
+        # Solo cuenta lo que la cola mantiene vivo: una vista del RingBuffer no ocupa memoria propia
+        if getattr(item, 'ring', True) is not None: return 0
+        return len(item.data)
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        self.owned_bytes += self._owned_size(item)
+
+    def _get(self) -> Any:
+        item = super()._get()
+        self.owned_bytes -= self._owned_size(item)
+        return item
+
+    def _count_drop(self, item: Any) -> None:
+        data = getattr(item, 'data', item)
+        self.dropped_items += 1
+        if isinstance(data, (bytes, bytearray, memoryview, str)): self.dropped_bytes += len(data)
+
+    def offer(self, item: Any) -> None:
+        if self.policy == "block" or self.maxsize <= 0:
+            if self.policy == "block" and self.max_bytes:
+                with self.not_full:
+                    while self.owned_bytes >= self.max_bytes: self.not_full.wait()
+            self.put(item)
+            return
+        with self.not_full:
+            if self._qsize() >= self.maxsize:
+                if self.policy == "drop-newest":
+                    self._count_drop(item)
+                    return
+                while self.queue and (self.policy == "coalesce" or self._qsize() >= self.maxsize):
+                    self._count_drop(self._get())
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def force_put(self, item: Any) -> None:
+        # Ignora la capacidad: para el marcador de cierre, que nunca debe bloquear ni perderse
+        with self.not_full:
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def clear(self) -> None:
+        with self.not_full:
+            while self.queue: self._count_drop(self._get())
+            self.not_full.notify_all()
+
+
+class Subscription:
+    # Cola propia de un consumidor del DataBus (visor, logger, decodificador...). Un consumidor lento solo
+    # retrasa su propia cola, nunca a los demás; con la política "block" frena al hilo lector (sin pérdidas).
+    # Con "block" la suscripción lleva un cursor en cada RingBuffer: los datos de un lote de get_batch() siguen
+    # siendo válidos hasta la siguiente llamada, que los libera. Con las demás políticas el lector no espera y el
+    # consumidor confirma con confirm() que los datos no se sobrescribieron mientras los usaba.
+    OWNED_BYTES_MAX = RingBuffer.DEFAULT_CAPACITY  # Tope de bytes propios (fuera del ring) en cola con "block"
+    def __init__(self, bus: "DataBus", name: str, notify: Optional[Callable[[], None]] = None, maxsize: int = 0,
+                 policy: str = "block", tx: bool = False):
+        self.bus = bus
+        self.name = name
+        self.notify = notify
+        # Solo las suscripciones con tx=True (p. ej. la captura binaria) reciben también los datos enviados
+        self.tx = tx
+        self.queue: BoundedQueue = BoundedQueue(maxsize, policy, self.OWNED_BYTES_MAX)
+        self.closing = False
+        self.closed = False
+        self.lost_bytes = 0
+        self.lossless = policy == "block"
+        self.rings: Tuple[RingBuffer, ...] = ()
+        # RingBuffer -> posición hasta la que se ha entregado; se libera en el siguiente get_batch()
+        self.delivered: Dict[RingBuffer, int] = {}
+
+    @property
+    def dropped_chunks(self) -> int:
+        return self.queue.dropped_items
+
+    @property
+    def dropped_bytes(self) -> int:
+        return self.queue.dropped_bytes
+
+    def put(self, chunk: Chunk) -> None:
+        if self.closing: return
+        # Se llama en el hilo lector, el único escritor del ring: el cursor se fija antes de que pueda avanzar
+        if self.lossless and chunk.ring is not None and chunk.ring not in self.rings:
+            chunk.ring.attach(self, chunk.ring_pos)
+            self.rings = self.rings + (chunk.ring,)
+        self.queue.offer(chunk)
+        if self.notify: self.notify()
+
+    def get_batch(self, timeout: Optional[float] = None) -> List[Chunk]:
+        # Espera al primer chunk (hasta timeout) y después drena todo lo pendiente sin bloquear
+        for ring, position in self.delivered.items(): ring.release(self, position)
+        self.delivered.clear()
+        chunks: List[Chunk] = []
+        try:
+            chunk = self.queue.get(timeout=timeout) if timeout != 0 else self.queue.get_nowait()
+            while True:
+                if chunk is None:
+                    self.closed = True
+                    self._detach()
+                    break
+                if chunk.is_valid():
+                    chunks.append(chunk)
+                    if self.lossless and chunk.ring is not None:
+                        self.delivered[chunk.ring] = chunk.ring_pos + len(chunk.data)
+                else:
+                    self.lost_bytes += len(chunk.data)
+                chunk = self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        return chunks
+
+    def confirm(self, chunk: Chunk) -> bool:
+        # Segunda comprobación, después de usar los datos: sin cursor, el lector ha podido sobrescribirlos mientras
+        # tanto y lo obtenido de ellos debe descartarse
+        if chunk.is_valid(): return True
+        self.lost_bytes += len(chunk.data)
+        return False
+
+    def _detach(self) -> None:
+        self.delivered.clear()
+        for ring in self.rings: ring.detach(self)
+
+    def close(self, discard: bool = False) -> None:
+        # Se deja de recibir; el consumidor verá closed=True tras drenar lo que ya estaba en su cola.
+        # discard=True lo usa el propio consumidor al abandonar: vacía la cola para no dejar bloqueado al lector.
+        if self.closing: return
+        self.closing = True
+        self.bus.unsubscribe(self)
+        if discard:
+            self.queue.clear()
+            self._detach()
+        self.queue.force_put(None)
+        if self.notify: self.notify()
+
+
+class DataBus:
+    # Reparto publish/subscribe alimentado directamente por el hilo lector. Los Chunk se comparten entre todas
+    # las colas sin copiar los datos.
+    def __init__(self):
+        self.subscribers: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, notify: Optional[Callable[[], None]] = None, maxsize: int = 0,
+                  policy: str = "block", tx: bool = False) -> Subscription:
+        subscription = Subscription(self, name, notify, maxsize, policy, tx)
+        with self._lock:
+            self.subscribers = self.subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self.subscribers = tuple(sub for sub in self.subscribers if sub is not subscription)
+
+    def publish(self, chunk: Chunk) -> None:
+        # La tupla se reemplaza entera al (des)suscribir, así que se recorre sin bloqueo
+        for subscription in self.subscribers:
+            if chunk.direction != Chunk.TX or subscription.tx: subscription.put(chunk)
 
 
 class SerialHandler:
-    def __init__(self, output_callback: Optional[Callable[[bytes], None]] = None):
+    READ_TIMEOUT = 0.1  # s; solo limita cuánto tarda el hilo en ver is_reading.clear()
+    READ_CHUNK_MAX = 65536
+    SPACE_TIMEOUT = READ_TIMEOUT  # s; espera máxima por sitio en el ring si un consumidor sin pérdidas va atrasado
+    RX_BUFFER_SIZE = 1 << 20  # Buffer del driver en Windows; evita overruns a 1-4 Mbaud
+    RECONNECT_BASE_DELAY = 0.5  # s; se dobla en cada intento fallido hasta 'reconnect_max_delay'
+    RECONNECT_MAX_DELAY = 30.0
+
+    def __init__(self, output_callback: Optional[Callable[[Chunk], None]] = None, port_id: int = 0,
+                 ring: Optional[RingBuffer] = None, bus: Optional[DataBus] = None):
         self.port_config: Dict[str, Any] = {}
         self.serial_port: Optional[serial.Serial] = None
         self.is_reading = threading.Event()
         self.reader_thread: Optional[threading.Thread] = None
+        # output_callback se llama en el hilo lector; los consumidores que no deben frenarlo usan bus.subscribe()
         self.output_callback = output_callback
-
-    def open_port(self, config: Dict[str, Any]) -> Tuple[bool, str]:
+        self.bus = bus or DataBus()
+        self.port_id = port_id
+        self.ring: Optional[RingBuffer] = ring
+        self.framer: Optional[ModbusRtuFramer] = None
+        self.space_timeout = self.SPACE_TIMEOUT
+        self._fd_reader: Optional[io.FileIO] = None
+        # --- Reconexión automática ---
+        self.usb_serial_number: Optional[str] = None
+        self.disconnected_since_ns: Optional[int] = None
+        self.next_retry_ns = 0
+        self.reconnect_delay = self.RECONNECT_BASE_DELAY
+        self.reconnect_count = 0
+        self.downtime_ns = 0
+
+    def open_port(self, config: Dict[str, Any], start_reader: bool = True) -> Tuple[bool, str]:
+        # start_reader=False deja la lectura en manos de un SerialPortManager (un solo hilo para N puertos)
         self.port_config = config
         try:
-            self.serial_port = serial.Serial()
-            self.serial_port.port = config.get('port')
+            self._open_serial(config.get('port'))
+            if start_reader or not self.ring:
+                self.ring = RingBuffer(int(config.get('ring_size', RingBuffer.DEFAULT_CAPACITY)))
+            self.framer = None
+            # Los decodificadores con framing "frame" necesitan el corte por silencio (t3.5) en el propio lector
+            if (config.get('framing') or DECODER_REGISTRY.framing(config.get('protocol'))) == "frame":
+                self.framer = ModbusRtuFramer(config.get('baud', 9600), config.get('databits', 8),
+                                              config.get('parity', 'none'), config.get('stopbits', 1))
+            self.disconnected_since_ns = None
+            self.usb_serial_number = config.get('usb_serial') or self._lookup_usb_serial(config.get('port'))
+            self.is_reading.set()
+            if start_reader:
+                self.reader_thread = threading.Thread(target=self._read_task, daemon=True)
+                self.reader_thread.start()
+            return True, f"Puerto {self.port_config['port']} abierto."
+        except (serial.SerialException, ValueError, KeyError) as e:
+            return False, f"Error al abrir puerto {config.get('port')}:\n{e}"
+
+    def _open_serial(self, device: str) -> None:
+        config = self.port_config
+        self.serial_port = serial.Serial()
+        try:
+            self.serial_port.port = device
             self.serial_port.baudrate = int(config.get('baud', 9600))
             self.serial_port.bytesize = \
                 {'5': serial.FIVEBITS, '6': serial.SIXBITS, '7': serial.SEVENBITS, '8': serial.EIGHTBITS}[
@@ -215,21 +1781,33 @@ class SerialHandler:
             self.serial_port.rtscts = handshake == "RTS/CTS"
             self.serial_port.xonxoff = handshake == "XON/XOFF"
             self.serial_port.dtr = config.get('dtr', True)
-            self.serial_port.timeout = 0.05
+            self.serial_port.timeout = self.READ_TIMEOUT
             self.serial_port.open()
-            self.is_reading.set()
-            self.reader_thread = threading.Thread(target=self._read_task, daemon=True)
-            self.reader_thread.start()
-            return True, f"Puerto {self.port_config['port']} abierto."
-        except (serial.SerialException, ValueError, KeyError) as e:
-            return False, f"Error al abrir puerto {config.get('port')}:\n{e}"
+            if hasattr(self.serial_port, 'set_buffer_size'):
+                self.serial_port.set_buffer_size(rx_size=self.RX_BUFFER_SIZE)
+        except (serial.SerialException, ValueError, KeyError):
+            self.serial_port = None
+            raise
+        self._fd_reader = None
+        if not IS_WINDOWS:
+            # En POSIX se lee directamente del descriptor con readinto(), sin objetos bytes intermedios
+            self._fd_reader = io.FileIO(self.serial_port.fileno(), 'rb', closefd=False)
+
+    def _close_serial(self) -> None:
+        if self.serial_port:
+            try:
+                self.serial_port.close()
+            except (serial.SerialException, OSError):
+                pass
+        self.serial_port = None
+        self._fd_reader = None
 
     def close_port(self) -> None:
-        if self.serial_port and self.serial_port.is_open:
+        # También detiene una reconexión en curso, aunque el puerto ya no esté abierto
+        if self.is_reading.is_set() or (self.serial_port and self.serial_port.is_open):
             self.is_reading.clear()
             if self.reader_thread and self.reader_thread.is_alive(): self.reader_thread.join(timeout=1)
-            self.serial_port.close()
-            self.serial_port = None
+            self._close_serial()
             print("Puerto cerrado.")
 
     def _read_task(self) -> None:
@@ -237,93 +1815,709 @@ class SerialHandler:
         try:
             while self.is_reading.is_set():
                 try:
-                    if self.serial_port and self.serial_port.in_waiting > 0:
-                        if self.port_config.get('protocol') == "Modbus-RTU":
-                            time.sleep(0.02)
-                            data = self.serial_port.read(self.serial_port.in_waiting)
+                    if self.disconnected_since_ns is not None:
+                        # Espera hasta el siguiente intento en pasos cortos para atender a close_port()
+                        wait_s = (self.next_retry_ns - time.monotonic_ns()) / 1_000_000_000
+                        if wait_s > 0:
+                            time.sleep(min(wait_s, self.READ_TIMEOUT))
                         else:
-                            data = self.serial_port.read(128)
-
-                        if data and self.output_callback:
-                            self.output_callback(data)
-                except serial.SerialException:
-                    if self.output_callback: self.output_callback(b"\n--- ERROR: Puerto serie desconectado ---\n")
-                    self.is_reading.clear()
-                    break
-                time.sleep(0.01)
+                            self._try_reconnect()
+                        continue
+                    if not self.serial_port: break
+                    self._pump(self._next_timeout())
+                except (serial.SerialException, OSError):
+                    if not self._handle_disconnect(): break
         finally:
             print("Hilo de lectura terminado.")
 
+    @staticmethod
+    def _lookup_usb_serial(device: Optional[str]) -> Optional[str]:
+        for info in serial.tools.list_ports.comports():
+            if info.device == device: return info.serial_number
+        return None
+
+    def _resolve_device(self) -> str:
+        # Un adaptador USB puede volver con otro nombre (ttyUSB0 -> ttyUSB1); se busca por número de serie
+        if self.usb_serial_number:
+            for info in serial.tools.list_ports.comports():
+                if info.serial_number == self.usb_serial_number: return info.device
+        return self.port_config['port']
+
+    def _handle_disconnect(self) -> bool:
+        # Devuelve True si el puerto queda en modo reconexión; False si la lectura termina
+        if not self.port_config.get('reconnect'):
+            self._report_disconnect()
+            return False
+        self._close_serial()
+        if self.framer: self.framer.frame_start = self.framer.frame_end
+        self.disconnected_since_ns = time.monotonic_ns()
+        self.reconnect_delay = self.RECONNECT_BASE_DELAY
+        self.next_retry_ns = self.disconnected_since_ns + int(self.reconnect_delay * 1_000_000_000)
+        port = self.port_config.get('port')
+        self._publish_marker(f"\n--- DESCONEXIÓN: {port} desconectado, reintentando con backoff ---\n")
+        return True
+
+    def _try_reconnect(self) -> bool:
+        try:
+            self._open_serial(self._resolve_device())
+        except (serial.SerialException, OSError, ValueError, KeyError):
+            max_delay = float(self.port_config.get('reconnect_max_delay', self.RECONNECT_MAX_DELAY))
+            self.reconnect_delay = min(self.reconnect_delay * 2, max_delay)
+            self.next_retry_ns = time.monotonic_ns() + int(self.reconnect_delay * 1_000_000_000)
+            return False
+        downtime_ns = time.monotonic_ns() - self.disconnected_since_ns
+        self.downtime_ns += downtime_ns
+        self.reconnect_count += 1
+        self.disconnected_since_ns = None
+        self._publish_marker(f"\n--- RECONEXIÓN: {self.serial_port.port} recuperado tras "
+                             f"{downtime_ns / 1_000_000_000:.3f} s sin datos ---\n")
+        return True
+
+    def _next_timeout(self) -> float:
+        if self.disconnected_since_ns is not None:
+            return max(0.0, (self.next_retry_ns - time.monotonic_ns()) / 1_000_000_000)
+        # Con una trama Modbus a medias solo se espera t3.5; en reposo se vuelve al timeout normal.
+        if self.framer and self.framer.pending(): return self.framer.t35_ns / 1_000_000_000
+        return self.READ_TIMEOUT
+
+    def _pump(self, timeout: Optional[float]) -> int:
+        # Una lectura completa: ring + framing + publicación. timeout=None cuando ya se sabe que hay datos.
+        start = self.ring.head
+        count = self._read_into_ring(timeout)
+        now_ns = time.monotonic_ns()
+        if self.framer:
+            spans = self.framer.feed(start, start + count, now_ns) if count else []
+            span = self.framer.poll(now_ns)
+            if span: spans.append(span)
+        else:
+            spans = [(start, start + count, now_ns)] if count else []
+        for span in spans: self._publish(*span)
+        return count
+
+    def _report_disconnect(self) -> None:
+        self._publish_marker("\n--- ERROR: Puerto serie desconectado ---\n")
+        self.is_reading.clear()
+
+    def _publish_marker(self, text: str) -> None:
+        # El aviso va en bytes propios, fuera del RingBuffer: así nunca queda dentro de una trama a medias
+        mono_ns = time.monotonic_ns()
+        self._deliver(Chunk(text.encode('utf-8'), mono_ns, mono_ns + self.ring.wall_offset_ns, self.port_id,
+                            direction=Chunk.EVENT))
+
+    def _read_into_ring(self, timeout: Optional[float]) -> int:
+        view = self.ring.write_view(self.READ_CHUNK_MAX, self.space_timeout)
+        # Ring lleno: los bytes esperan en el buffer del driver hasta que el consumidor atrasado libere sitio
+        if not view: return 0
+        if self._fd_reader:
+            # Bloquea en el descriptor hasta que hay datos (sin CPU en reposo) y los drena de una vez
+            if timeout is not None and not select.select([self._fd_reader], [], [], timeout)[0]: return 0
+            count = self._fd_reader.readinto(view)
+            if count == 0: raise serial.SerialException("El dispositivo no devuelve datos (¿desconectado?)")
+            count = count or 0
+        elif timeout is None:
+            pending = min(self.serial_port.in_waiting, len(view))
+            count = self.serial_port.readinto(view[:pending]) if pending else 0
+        else:
+            # read(1) bloquea (WaitForSingleObject) hasta el primer byte; el resto ya está en el buffer del driver
+            if self.serial_port.timeout != timeout: self.serial_port.timeout = timeout
+            first = self.serial_port.read(1)
+            if not first: return 0
+            view[0] = first[0]
+            pending = min(self.serial_port.in_waiting, len(view) - 1)
+            count = 1 + (self.serial_port.readinto(view[1:1 + pending]) if pending else 0)
+        self.ring.advance(count)
+        return count
+
+    def _publish(self, start: int, end: int, mono_ns: int) -> None:
+        self._deliver(Chunk(self.ring.span_view(start, end), mono_ns, mono_ns + self.ring.wall_offset_ns,
+                            self.port_id, self.ring, start))
+
+    def _deliver(self, chunk: Chunk) -> None:
+        self.bus.publish(chunk)
+        if self.output_callback: self.output_callback(chunk)
+
+    def publish_tx(self, data: bytes) -> None:
+        # Lo enviado se publica como TX (bytes propios, fuera del RingBuffer) para que la captura lo registre
+        mono_ns = time.monotonic_ns()
+        wall_offset_ns = self.ring.wall_offset_ns if self.ring else time.time_ns() - mono_ns
+        self.bus.publish(Chunk(bytes(data), mono_ns, mono_ns + wall_offset_ns, self.port_id, direction=Chunk.TX))
+
     def write_data(self, data: Union[str, bytes], encoding: str = 'utf-8') -> Tuple[bool, Optional[str]]:
         if self.serial_port and self.serial_port.is_open:
             try:
-                if isinstance(data, str):
-                    self.serial_port.write(data.encode(encoding))
-                elif isinstance(data, bytes):
-                    self.serial_port.write(data)
+                if isinstance(data, str): data = data.encode(encoding)
+                self.serial_port.write(data)
+                self.publish_tx(data)
                 return True, None
             except serial.SerialException as e:
                 return False, f"Error al enviar datos: {e}"
         return False, "Puerto no está abierto."
 
 
+class SerialPortManager:
+    # Abre N puertos y los atiende desde un único hilo de E/S con selectors. Cada puerto tiene su propio
+    # RingBuffer (las tramas Modbus a medias son rangos contiguos de su ring; un ring compartido las mezclaría con
+    # los bytes de otros puertos), todos con el mismo ancla de hora; todos publican en el mismo DataBus y cada
+    # Chunk lleva el port_id (índice en self.handlers).
+    POLL_INTERVAL = 0.001  # s; solo en Windows, donde los handles serie no admiten select()
+
+    def __init__(self, output_callback: Optional[Callable[[Chunk], None]] = None):
+        self.output_callback = output_callback
+        self.bus = DataBus()
+        self.handlers: List[SerialHandler] = []
+        self.wall_anchor_ns: Optional[int] = None
+        self.selector: Optional[selectors.BaseSelector] = None
+        self.is_reading = threading.Event()
+        self.io_thread: Optional[threading.Thread] = None
+
+    @property
+    def port_names(self) -> List[str]:
+        return [handler.port_config.get('port', '') for handler in self.handlers]
+
+    @property
+    def wall_offset_ns(self) -> int:
+        return self.wall_anchor_ns if self.wall_anchor_ns is not None else time.time_ns() - time.monotonic_ns()
+
+    def open_ports(self, configs: List[Dict[str, Any]]) -> Tuple[bool, str]:
+        if not configs: return False, "No se ha indicado ningún puerto."
+        capacity = int(configs[0].get('ring_size', RingBuffer.DEFAULT_CAPACITY))
+        self.wall_anchor_ns = time.time_ns() - time.monotonic_ns()
+        self.handlers = []
+        for port_id, config in enumerate(configs):
+            ring = RingBuffer(capacity, self.wall_anchor_ns)
+            handler = SerialHandler(self.output_callback, port_id=port_id, ring=ring, bus=self.bus)
+            success, message = handler.open_port(config, start_reader=False)
+            if not success:
+                self.close_ports()
+                return False, message
+            self.handlers.append(handler)
+        if not IS_WINDOWS:
+            self.selector = selectors.DefaultSelector()
+            for handler in self.handlers: self.selector.register(handler._fd_reader, selectors.EVENT_READ, handler)
+        self.is_reading.set()
+        self.io_thread = threading.Thread(target=self._io_task, daemon=True)
+        self.io_thread.start()
+        if len(self.handlers) == 1: return True, f"Puerto {self.port_names[0]} abierto."
+        return True, f"{len(self.handlers)} puertos abiertos: {', '.join(self.port_names)}."
+
+    def close_ports(self) -> None:
+        self.is_reading.clear()
+        if self.io_thread and self.io_thread.is_alive(): self.io_thread.join(timeout=1)
+        self.io_thread = None
+        if self.selector:
+            self.selector.close()
+            self.selector = None
+        for handler in self.handlers: handler.close_port()
+
+    def write_data(self, data: Union[str, bytes], encoding: str = 'utf-8',
+                   port_id: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        # port_id=None envía a todos los puertos abiertos
+        targets = self.handlers if port_id is None else self.handlers[port_id:port_id + 1]
+        if not targets: return False, "Puerto no está abierto."
+        for handler in targets:
+            success, message = handler.write_data(data, encoding)
+            if not success: return False, f"{handler.port_config.get('port')}: {message}"
+        return True, None
+
+    def _io_task(self) -> None:
+        print("Hilo de E/S multipuerto iniciado.")
+        active = list(self.handlers)
+        try:
+            while self.is_reading.is_set() and active:
+                ready = set()
+                if self.selector:
+                    timeout = min(handler._next_timeout() for handler in active)
+                    ready = {key.data for key, _ in self.selector.select(timeout)}
+                received = 0
+                for handler in list(active):
+                    if handler.disconnected_since_ns is not None:
+                        if time.monotonic_ns() >= handler.next_retry_ns and handler._try_reconnect() and self.selector:
+                            self.selector.register(handler._fd_reader, selectors.EVENT_READ, handler)
+                        continue
+                    # Sin selector (Windows) se recorren todos los puertos leyendo solo lo que ya hay en el driver
+                    has_data = handler in ready or not self.selector
+                    if not has_data and not (handler.framer and handler.framer.pending()): continue
+                    try:
+                        received += handler._pump(None if has_data else 0)
+                    except (serial.SerialException, OSError):
+                        if self.selector: self.selector.unregister(handler._fd_reader)
+                        if not handler._handle_disconnect(): active.remove(handler)
+                if not self.selector and not received: time.sleep(self.POLL_INTERVAL)
+        finally:
+            self.is_reading.clear()
+            print("Hilo de E/S multipuerto terminado.")
+
+
+class CaptureReplay:
+    # Fuente de datos que sustituye a SerialPortManager: lee una captura .slcap y publica sus Chunk en el DataBus
+    # al ritmo original (speed=1), N veces más rápido (speed=N) o sin esperas (speed=0). Permite reproducir
+    # incidencias sin hardware, pasar capturas por los decodificadores y el log, y medir el caudal de la cadena.
+    def __init__(self, path: Union[str, Path], speed: float = 1.0,
+                 output_callback: Optional[Callable[[Chunk], None]] = None):
+        self.path = Path(path)
+        self.speed = max(0.0, float(speed))
+        self.output_callback = output_callback
+        self.bus = DataBus()
+        self.reader: Optional[CaptureReader] = None
+        self.port_names: List[str] = []
+        self.wall_offset_ns = 0
+        self.is_reading = threading.Event()
+        self.stop_event = threading.Event()
+        self.replay_thread: Optional[threading.Thread] = None
+        self.replayed_chunks = 0
+        self.replayed_bytes = 0
+
+    def open_ports(self, configs: Optional[List[Dict[str, Any]]] = None) -> Tuple[bool, str]:
+        # configs se ignora: los puertos son los que figuran en la captura
+        try:
+            self.reader = CaptureReader(self.path)
+            self.reader.read_session()
+        except (OSError, ValueError) as e:
+            return False, f"Error al abrir la captura {self.path}:\n{e}"
+        self.port_names = list(self.reader.port_names)
+        self.wall_offset_ns = self.reader.wall_offset_ns
+        self.stop_event.clear()
+        self.is_reading.set()
+        self.replay_thread = threading.Thread(target=self._replay_task, daemon=True)
+        self.replay_thread.start()
+        pace = f"x{self.speed:g}" if self.speed else "velocidad máxima"
+        return True, f"Reproduciendo {self.path.name} ({', '.join(self.port_names)}) a {pace}."
+
+    def close_ports(self) -> None:
+        self.stop_event.set()
+        if self.replay_thread and self.replay_thread.is_alive(): self.replay_thread.join(timeout=1)
+        self.replay_thread = None
+
+    def write_data(self, data: Union[str, bytes], encoding: str = 'utf-8',
+                   port_id: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        return False, "No se puede enviar durante una reproducción."
+
+    def _replay_task(self) -> None:
+        print("Hilo de reproducción iniciado.")
+        start = time.perf_counter()
+        session = 0
+        first_ns = origin_ns = 0
+        try:
+            for chunk in self.reader:
+                if self.stop_event.is_set(): break
+                # Cada sesión de la captura tiene su propio reloj monotónico: el ritmo se reancla en cada una
+                if self.reader.sessions != session:
+                    session = self.reader.sessions
+                    first_ns, origin_ns = chunk.mono_ns, time.monotonic_ns()
+                    if len(self.reader.port_names) > len(self.port_names):
+                        self.port_names = list(self.reader.port_names)
+                if self.speed:
+                    wait_ns = (chunk.mono_ns - first_ns) / self.speed - (time.monotonic_ns() - origin_ns)
+                    if wait_ns > 0 and self.stop_event.wait(wait_ns / 1_000_000_000): break
+                self.bus.publish(chunk)
+                if self.output_callback: self.output_callback(chunk)
+                self.replayed_chunks += 1
+                self.replayed_bytes += len(chunk.data)
+        except (OSError, ValueError) as e:
+            print(f"Error al leer la captura: {e}")
+        finally:
+            self.is_reading.clear()
+            elapsed = time.perf_counter() - start
+            print(f"Reproducción: {self.replayed_chunks} bloques, {self.replayed_bytes} bytes en {elapsed:.3f} s "
+                  f"({self.replayed_bytes / max(elapsed, 1e-9) / 1e6:.2f} MB/s).")
+            print("Hilo de reproducción terminado.")
+
+
+class AsyncSerialPort:
+    # API asyncio sobre SerialHandler: "async for chunk in port" y "await port.write(...)". En POSIX se lee
+    # con loop.add_reader() sobre el descriptor no bloqueante, sin hilo lector; en Windows (sin add_reader para
+    # handles serie) se reutiliza el hilo del handler y solo se despierta al bucle.
+    def __init__(self):
+        self.handler = SerialHandler()
+        self.is_reading = self.handler.is_reading
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscription: Optional[Subscription] = None
+        self._pending: Deque[Chunk] = deque()
+        self._data_ready: Optional[asyncio.Event] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def open_port(self, config: Dict[str, Any]) -> Tuple[bool, str]:
+        # Debe llamarse desde el bucle asyncio que consumirá los datos
+        self._loop = asyncio.get_running_loop()
+        self._data_ready = asyncio.Event()
+        self._pending.clear()
+        use_loop_reader = not IS_WINDOWS
+        # El lector del bucle no puede esperar sitio en el ring: quien lo libera es el propio bucle
+        self.handler.space_timeout = 0 if use_loop_reader else SerialHandler.SPACE_TIMEOUT
+        if self._subscription: self._subscription.close()
+        if use_loop_reader:
+            self._subscription = self.handler.bus.subscribe("asyncio", self._data_ready.set)
+        else:
+            self._subscription = self.handler.bus.subscribe(
+                "asyncio", lambda: self._loop.call_soon_threadsafe(self._data_ready.set))
+        success, message = self.handler.open_port(config, start_reader=not use_loop_reader)
+        if not success: return success, message
+        if use_loop_reader: self._loop.add_reader(self.handler._fd_reader, self._on_readable)
+        return success, message
+
+    def close_port(self) -> None:
+        self._cancel_timer()
+        if self.handler._fd_reader and self._loop: self._loop.remove_reader(self.handler._fd_reader)
+        self.handler.close_port()
+        if self._subscription: self._subscription.close()
+
+    def __aiter__(self) -> "AsyncSerialPort":
+        return self
+
+    async def __anext__(self) -> Chunk:
+        # Los Chunk apuntan al RingBuffer: hay que consumirlos antes de que el lector dé la vuelta
+        while not self._pending:
+            if self._subscription is None: raise StopAsyncIteration
+            self._data_ready.clear()
+            self._pending.extend(self._subscription.get_batch(timeout=0))
+            if self._pending: break
+            if not self.is_reading.is_set() or self._subscription.closed: raise StopAsyncIteration
+            await self._data_ready.wait()
+        return self._pending.popleft()
+
+    async def write(self, data: Union[str, bytes], encoding: str = 'utf-8') -> Tuple[bool, Optional[str]]:
+        if not (self.handler.serial_port and self.handler.serial_port.is_open): return False, "Puerto no está abierto."
+        if isinstance(data, str): data = data.encode(encoding)
+        if not self.handler._fd_reader:
+            return await self._loop.run_in_executor(None, self.handler.write_data, data, encoding)
+        fd = self.handler._fd_reader.fileno()
+        view = memoryview(data)
+        try:
+            while view:
+                try:
+                    view = view[os.write(fd, view):]
+                except BlockingIOError:
+                    await self._wait_writable(fd)
+        except OSError as e:
+            return False, f"Error al enviar datos: {e}"
+        self.handler.publish_tx(data)
+        return True, None
+
+    async def _wait_writable(self, fd: int) -> None:
+        writable = self._loop.create_future()
+        self._loop.add_writer(fd, writable.set_result, None)
+        try:
+            await writable
+        finally:
+            self._loop.remove_writer(fd)
+
+    def _on_readable(self, timeout: Optional[float] = None) -> None:
+        self._cancel_timer()
+        try:
+            self.handler._pump(timeout)
+        except (serial.SerialException, OSError):
+            self._loop.remove_reader(self.handler._fd_reader)
+            if self.handler._handle_disconnect(): self._schedule_reconnect()
+        else:
+            # Sin hilo lector, el corte por silencio t3.5 de Modbus se programa en el propio bucle
+            framer = self.handler.framer
+            if framer and framer.pending():
+                self._timer = self._loop.call_later(framer.t35_ns / 1_000_000_000, self._on_readable, 0)
+        self._data_ready.set()
+
+    def _schedule_reconnect(self) -> None:
+        self._timer = self._loop.call_later(self.handler._next_timeout(), self._retry_reconnect)
+
+    def _retry_reconnect(self) -> None:
+        self._timer = None
+        if not self.is_reading.is_set(): return
+        if self.handler._try_reconnect():
+            self._loop.add_reader(self.handler._fd_reader, self._on_readable)
+        else:
+            self._schedule_reconnect()
+        self._data_ready.set()
+
+    def _cancel_timer(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+
+def run_benchmark():
+    # Micro-benchmarks de las rutas críticas: --benchmark
+    print(f"--- SerialLogger Benchmark v{SerialLoggerApp.VERSION} ---")
+
+    def timed(func: Callable[[], Any], repeat: int = 3) -> float:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    # CRC Modbus: 10000 tramas de 8 a 64 bytes, como un bus saturado
+    bodies = [os.urandom(6 + i % 57) for i in range(10000)]
+    frames = [body + calculate_crc16(body).to_bytes(2, 'little') for body in bodies]
+    total_bytes = sum(len(frame) for frame in frames)
+    bitwise = timed(lambda: [calculate_crc16_bitwise(body) for body in bodies])
+    table = timed(lambda: [calculate_crc16(body) for body in bodies])
+    batch = timed(lambda: verify_crc16_batch(frames))
+    assert all(verify_crc16_batch(frames))
+    print(f"CRC-16 Modbus ({len(frames)} tramas, {total_bytes} bytes):")
+    print(f"  bit a bit:   {bitwise * 1000:8.1f} ms  ({total_bytes / bitwise / 1e6:6.2f} MB/s)")
+    print(f"  por tabla:   {table * 1000:8.1f} ms  ({total_bytes / table / 1e6:6.2f} MB/s)  x{bitwise / table:.1f}")
+    print(f"  {'lote numpy:' if NUMPY_AVAILABLE else 'lote:':12} {batch * 1000:8.1f} ms  "
+          f"({total_bytes / batch / 1e6:6.2f} MB/s)  x{bitwise / batch:.1f}")
+
+    # Captura binaria: bloques de 64 bytes (lecturas cortas, el peor caso) frente a los ~400 KB/s de 4 Mbaud
+    payload = memoryview(os.urandom(64))
+    chunks = [Chunk(payload, i, i, i % 2, direction=Chunk.TX if i % 7 == 0 else Chunk.RX) for i in range(50000)]
+    with tempfile.TemporaryDirectory() as directory:
+        def write_capture():
+            capture = CaptureWriter(Path(directory) / "bench.slcap", ["A", "B"], 0)
+            for chunk in chunks: capture.write_chunk(chunk)
+            capture.close()
+        capture_time = timed(write_capture)
+    capture_bytes = len(chunks) * len(payload)
+    print(f"Captura binaria ({len(chunks)} bloques de {len(payload)} bytes):")
+    print(f"  {capture_time * 1000:8.1f} ms  ({capture_bytes / capture_time / 1e6:6.2f} MB/s, "
+          f"x{capture_bytes / capture_time / 400_000:.0f} el caudal de 4 Mbaud)")
+
+    # Corte en líneas: el bucle de str (+= y split('\n', 1) por línea) frente a LineFramer. Bloques de 16 KB con
+    # líneas NMEA cortas (muchas líneas por bloque) y una línea de 1 MB que llega en bloques de 256 bytes.
+    def split_str(blocks: List[bytes]) -> int:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        buffer, count = '', 0
+        for block in blocks:
+            buffer += decoder.decode(block)
+            while '\n' in buffer:
+                line, buffer = buffer.split('\n', 1)
+                count += 1
+        return count
+
+    def split_framer(blocks: List[bytes]) -> int:
+        framer, count = LineFramer(), 0
+        for block in blocks: count += len(framer.feed(block))
+        return count
+
+    sentence = b"$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47\r\n"
+    stream = sentence * (8 * 2 ** 20 // len(sentence))
+    cases = [("líneas cortas", [stream[i:i + 16384] for i in range(0, len(stream), 16384)]),
+             ("línea de 1 MB", [b"x" * 256] * 4096 + [b"\n"])]
+    print("Corte en líneas:")
+    for label, blocks in cases:
+        size = sum(len(block) for block in blocks)
+        assert split_str(blocks) == split_framer(blocks)
+        lines = split_framer(blocks)
+        old = timed(lambda: split_str(blocks), 1)
+        new = timed(lambda: split_framer(blocks))
+        print(f"  {label + ':':15} str {old * 1000:8.1f} ms, LineFramer {new * 1000:7.1f} ms  "
+              f"({lines / new:12,.0f} líneas/s, {size / new / 1e6:6.1f} MB/s)  x{old / new:.1f}")
+
+
 def run_cli_mode(args):
     print(f"--- SerialLogger CLI v{SerialLoggerApp.VERSION} ---");
     print("Presiona Ctrl+C para salir.")
-    config = {'port': args.port, 'baud': args.baud, 'databits': args.databits, 'stopbits': args.stopbits,
+    config = {'baud': args.baud, 'databits': args.databits, 'stopbits': args.stopbits,
               'parity': args.parity, 'dtr': not args.no_dtr, 'timestamp': args.timestamp, 'delimiter': ' ',
-              'encoding': args.encoding}
+              'encoding': args.encoding, 'reconnect': args.reconnect, 'usb_serial': args.usb_serial}
+    # Con --replay los puertos son los de la captura; se conocen al abrirla
+    ports: List[str] = args.port or []
+    multi_port = len(ports) > 1
     logfile = None;
-    line_buffer = '';
+    line_states: Dict[int, PortLineState] = {}
+    framers: Dict[int, LineFramer] = {}
+    last_port_id: Optional[int] = None
     start_of_line = True
     try:
-        decoder = codecs.getincrementaldecoder(config['encoding'])(errors='replace')
+        codecs.getincrementaldecoder(config['encoding'])
     except Exception as e:
         print(f"Error: Codificación '{config['encoding']}' no válida. {e}");
         return
     if args.log:
         try:
-            logfile = open(args.log, 'a', encoding='utf-8');
+            logfile = LogWriter(args.log, args.flush_bytes, args.flush_ms, not args.no_idle_flush, args.fsync_ms,
+                                int(args.rotate_mb * 2 ** 20), args.rotate_minutes * 60, args.compress,
+                                int(args.retain_mb * 2 ** 20), time_index=not args.no_time_index);
             print(f"Registrando en: {args.log}")
         except IOError as e:
             print(f"Error al abrir el archivo de log: {e}");
             logfile = None
-
-    def console_output(raw_chunk):
-        nonlocal start_of_line, line_buffer
-        decoded_string = decoder.decode(raw_chunk)
-        for char in decoded_string:
-            if start_of_line:
-                ts = get_timestamp(config['timestamp'], config['delimiter'])
-                if ts: sys.stdout.write(ts)
+    decoder_session: Optional[DecoderSession] = None
+    # Como en la GUI: un protocolo binario lleva al log las tramas decodificadas; uno de texto, las líneas
+    binary_log = bool(logfile and args.protocol and DECODER_REGISTRY.framing(args.protocol) in ("stream", "frame"))
+
+    def console_output(chunk: Chunk):
+        nonlocal start_of_line, last_port_id
+        state = line_states.get(chunk.port_id)
+        if state is None: state = line_states[chunk.port_id] = PortLineState(config['encoding'])
+        port_tag = f"[{ports[chunk.port_id]}] " if multi_port else ""
+        decoded_string = state.decoder.decode(chunk.data)
+        framer = lines = None
+        if logfile:
+            framer = framers.get(chunk.port_id)
+            if framer is None: framer = framers[chunk.port_id] = LineFramer(config['encoding'])
+            lines = framer.feed(chunk.data, chunk.wall_ns)
+        # Con una política con pérdidas el lector no espera: si ya sobrescribió los datos, el bloque se descarta
+        if not subscription.confirm(chunk): return
+        # Con varios puertos, una línea a medias se corta al cambiar de puerto para no mezclar los flujos
+        if chunk.port_id != last_port_id:
+            if not start_of_line and multi_port: sys.stdout.write('\n')
+            start_of_line = start_of_line or multi_port
+            last_port_id = chunk.port_id
+        # Un write y un flush por bloque: el prefijo va delante de cada línea que empieza en él
+        prefix = get_timestamp(config['timestamp'], config['delimiter'], chunk.wall_ns) + port_tag
+        if decoded_string and prefix:
+            pieces = decoded_string.split('\n')
+            output = []
+            for piece in pieces[:-1]:
+                output.append(prefix + piece + '\n' if start_of_line else piece + '\n')
+                start_of_line = True
+            if pieces[-1]:
+                output.append(prefix + pieces[-1] if start_of_line else pieces[-1])
                 start_of_line = False
-            sys.stdout.write(char);
+            sys.stdout.write(''.join(output))
+        elif decoded_string:
+            sys.stdout.write(decoded_string)
+            start_of_line = decoded_string.endswith('\n')
+        sys.stdout.flush()
+        if lines:
+            first_prefix = get_timestamp(config['timestamp'], config['delimiter'], framer.batch_start_ns) + port_tag
+            logfile.write(LineFramer.join(lines, first_prefix, prefix), framer.batch_start_ns);
+
+    def write_records(records: List[DecodedRecord]):
+        output = []
+        for record in records:
+            timestamp = get_timestamp(config['timestamp'], config['delimiter'], record.timestamp)
+            text = f"{timestamp}[{record.port}] {record.render()}" if record.port else f"{timestamp}{record.render()}"
+            output.append(text)
+            if binary_log: logfile.write(text, record.timestamp)
+        if output:
+            sys.stdout.write(''.join(output))
             sys.stdout.flush()
-            if char == '\n': start_of_line = True
-        if logfile:
-            line_buffer += decoded_string
-            while '\n' in line_buffer:
-                line, line_buffer = line_buffer.split('\n', 1)
-                ts = get_timestamp(config['timestamp'], config['delimiter'])
-                logfile.write(f"{ts}{line}\n");
-                logfile.flush()
-
-    handler = SerialHandler(output_callback=console_output)
-    success, message = handler.open_port(config)
+
+    def decoded_output(chunk: Chunk):
+        # Con --protocol la consola muestra los registros decodificados en lugar del texto crudo
+        port_tag = f"[{ports[chunk.port_id]}] " if multi_port else ""
+        framer = lines = None
+        if logfile and not binary_log:
+            framer = framers.get(chunk.port_id)
+            if framer is None: framer = framers[chunk.port_id] = LineFramer(config['encoding'])
+            lines = framer.feed(chunk.data, chunk.wall_ns)
+        records = decoder_session.feed(chunk)
+        if not subscription.confirm(chunk): return
+        if chunk.direction == Chunk.EVENT:
+            # El aviso de corte no pasa por el decodificador, pero debe verse en la consola y quedar en el log
+            marker = bytes(chunk.data).decode('utf-8', errors='replace').strip()
+            text = f"{get_timestamp(config['timestamp'], config['delimiter'], chunk.wall_ns)}{port_tag}{marker}\n"
+            sys.stdout.write(text)
+            if binary_log: logfile.write(text, chunk.wall_ns)
+        write_records(records)
+        if lines:
+            first_prefix = get_timestamp(config['timestamp'], config['delimiter'], framer.batch_start_ns) + port_tag
+            prefix = get_timestamp(config['timestamp'], config['delimiter'], chunk.wall_ns) + port_tag
+            logfile.write(LineFramer.join(lines, first_prefix, prefix), framer.batch_start_ns)
+
+    # La consola se alimenta desde su propia suscripción en el hilo principal: un terminal lento no frena al lector
+    manager = CaptureReplay(args.replay, args.speed) if args.replay else SerialPortManager()
+    # Una reproducción que se decodifica no puede tener huecos (a --speed 0 la cola se llenaría enseguida): la
+    # cola pasa a ser sin pérdidas y es la reproducción la que espera
+    policy = "block" if args.replay and args.protocol else args.queue_policy
+    subscription = manager.bus.subscribe("cli", None, args.queue_size, policy)
+    # La captura binaria nunca descarta: su cola siempre es "block"
+    capture_subscription = manager.bus.subscribe("capture", None, args.queue_size, "block", tx=True) \
+        if args.capture else None
+    capture_thread = None
+    success, message = manager.open_ports([dict(config, port=port) for port in ports])
     print(message)
-    if not success: return
+    if not success:
+        if capture_subscription: capture_subscription.close()
+        return
+    ports = manager.port_names
+    multi_port = len(ports) > 1
+    if args.protocol: decoder_session = DecoderSession(args.protocol, config['encoding'], ports)
+    output = decoded_output if decoder_session else console_output
+    if capture_subscription:
+        try:
+            capture = CaptureWriter(args.capture, manager.port_names, manager.wall_offset_ns,
+                                    flush_bytes=args.flush_bytes, flush_ms=args.flush_ms,
+                                    flush_on_idle=not args.no_idle_flush, fsync_ms=args.fsync_ms,
+                                    rotate_bytes=int(args.rotate_mb * 2 ** 20), rotate_seconds=args.rotate_minutes * 60,
+                                    compression=args.compress, retain_bytes=int(args.retain_mb * 2 ** 20),
+                                    time_index=not args.no_time_index)
+            print(f"Capturando en: {args.capture}")
+        except OSError as e:
+            print(f"Error al abrir el archivo de captura: {e}");
+            capture_subscription.close(discard=True)
+        else:
+            capture_thread = threading.Thread(target=capture_task, args=(capture_subscription, capture), daemon=True)
+            capture_thread.start()
     try:
-        while handler.is_reading.is_set(): time.sleep(1)
+        while manager.is_reading.is_set():
+            flush_timeout = logfile.timeout() if logfile else None
+            timeout = 0.5 if flush_timeout is None else min(0.5, flush_timeout)
+            for chunk in subscription.get_batch(timeout=timeout): output(chunk)
+            if logfile: logfile.poll(idle=subscription.queue.empty())
     except KeyboardInterrupt:
         print("\nCerrando...")
     finally:
-        handler.close_port()
+        manager.close_ports()
+        subscription.close()
+        if capture_subscription: capture_subscription.close()
+        if capture_thread: capture_thread.join()
+        while not subscription.closed:
+            for chunk in subscription.get_batch(): output(chunk)
+        if decoder_session: write_records(decoder_session.flush())
         if logfile:
-            if line_buffer:
-                ts = get_timestamp(config['timestamp'], config['delimiter'])
-                logfile.write(f"{ts}{line_buffer.strip()}\n")
+            for port_id, framer in framers.items():
+                start_ns = framer.line_start_ns
+                line = framer.pending()
+                if line:
+                    ts = get_timestamp(config['timestamp'], config['delimiter'], start_ns)
+                    port_tag = f"[{ports[port_id]}] " if multi_port else ""
+                    logfile.write(f"{ts}{port_tag}{line.strip()}\n", start_ns)
             logfile.close();
-            print("Archivo de log cerrado.")
+            print(f"Archivo de log cerrado: {logfile.stats_text()}")
+        if subscription.dropped_chunks or subscription.lost_bytes:
+            print(f"Aviso: {subscription.dropped_chunks} bloques ({subscription.dropped_bytes} B) descartados por la "
+                  f"cola, {subscription.lost_bytes} B perdidos por el buffer circular.")
+
+
+def run_view(args):
+    # Ventana de líneas de un log grande: --line N (negativo = desde el final) o --time HORA, y --count M
+    try:
+        log = MappedLog(args.view, args.encoding)
+    except (OSError, ValueError) as e:
+        print(f"Error al abrir {args.view}: {e}", file=sys.stderr)
+        return
+    try:
+        if args.time:
+            # Con el índice de horas solo se lee el bloque de destino, sin esperar al índice de líneas
+            try:
+                offset = TimeIndex.seek(args.view, TimeIndex.parse_time(args.time, TimeIndex.first_time(args.view)))
+            except (OSError, ValueError) as e:
+                print(f"Error al buscar la hora '{args.time}': {e}", file=sys.stderr)
+                return
+            for line in log.lines_at(offset, args.count): print(line)
+            return
+        start = args.line
+        if start < 0:
+            log.wait()
+            start = max(0, log.line_count() + start)
+        else:
+            log.wait(start + args.count)
+        for line in log.lines(start, args.count): print(line)
+    finally:
+        log.close()
+
+
+def run_export_text(args) -> int:
+    # Texto derivado de una captura .slcap: a --log si se indica, si no a la salida estándar. Devuelve el código de
+    # salida del proceso
+    reader = CaptureReader(args.export_text)
+    out = None
+    try:
+        out = LogWriter(args.log) if args.log else sys.stdout
+        line_count = export_capture_text(reader, out, args.timestamp, ' ', args.encoding)
+    except (OSError, ValueError) as e:
+        print(f"Error al exportar la captura: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if isinstance(out, LogWriter): out.close()
+    print(f"{line_count} líneas exportadas de {reader.sessions} sesiones.", file=sys.stderr)
+    if reader.truncated_bytes:
+        print(f"Aviso: {reader.truncated_bytes} bytes finales incompletos ignorados.", file=sys.stderr)
+    return 0
 
 
 class SearchDialog(tk.Toplevel):
@@ -382,6 +2576,120 @@ class SearchDialog(tk.Toplevel):
         self.text_widget.focus_set()
 
 
+class LogViewer(tk.Toplevel):
+    # Visor de solo lectura para logs grandes: el Text contiene únicamente las líneas visibles, que se piden a un
+    # MappedLog; la barra de desplazamiento se gobierna a mano en función de la línea superior y el total.
+    REFRESH_MS = 250
+
+    def __init__(self, parent, path: Union[str, Path], colors: Dict[str, str]):
+        self.log = MappedLog(path, follow=True)
+        super().__init__(parent)
+        self.top_line = 0
+        self.follow_end = False
+        # (línea superior, tamaño del archivo, líneas visibles) de lo que muestra el Text
+        self.rendered: Optional[Tuple[int, int, int]] = None
+        self.geometry("+%d+%d" % (parent.winfo_rootx() + 60, parent.winfo_rooty() + 60))
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.text = tk.Text(self, wrap='none', height=40, width=120, relief="solid", borderwidth=1,
+                            background=colors["bg"], foreground=colors["fg"], insertbackground=colors["cursor"])
+        self.scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.scroll.grid(row=0, column=1, sticky="ns")
+        self.status_var = tk.StringVar()
+        bottom = ttk.Frame(self)
+        bottom.grid(row=1, column=0, columnspan=2, sticky="ew")
+        ttk.Label(bottom, textvariable=self.status_var, anchor="w").pack(side="left", fill="x", expand=True)
+        ttk.Button(bottom, text="Ir a hora...", command=self._goto_time).pack(side="right")
+
+        self.text.bind("<MouseWheel>", lambda e: self._scroll_lines(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self._scroll_lines(-3))
+        self.text.bind("<Button-5>", lambda e: self._scroll_lines(3))
+        self.bind("<Up>", lambda e: self._scroll_lines(-1))
+        self.bind("<Down>", lambda e: self._scroll_lines(1))
+        self.bind("<Prior>", lambda e: self._scroll_lines(-self._visible_lines()))
+        self.bind("<Next>", lambda e: self._scroll_lines(self._visible_lines()))
+        self.bind("<Control-Home>", lambda e: self._goto_line(0))
+        self.bind("<Control-End>", lambda e: self._goto_line(self.log.line_count()))
+        self.bind("<Control-g>", lambda e: self._goto_time())
+        self.text.bind("<Configure>", lambda e: self._render())
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.bind("<Escape>", lambda e: self._on_close())
+        self._refresh()
+
+    def _visible_lines(self) -> int:
+        linespace = font.Font(font=self.text.cget('font')).metrics('linespace')
+        return max(1, self.text.winfo_height() // max(1, linespace))
+
+    def _goto_line(self, line: int) -> None:
+        last_top = max(0, self.log.line_count() - self._visible_lines())
+        self.top_line = min(max(0, line), last_top)
+        # En el final, el visor sigue las líneas nuevas como un "tail -f"
+        self.follow_end = self.top_line == last_top
+        self._render()
+
+    def _goto_time(self) -> None:
+        # Bisección en el índice .tidx hasta el offset y de ahí al número de línea, sin leer el resto del log
+        text = simpledialog.askstring("Ir a hora", "Hora (03:12:40 o 2026-10-16 03:12:40):", parent=self)
+        if not text: return
+        try:
+            offset = TimeIndex.seek(self.log.path, TimeIndex.parse_time(text, TimeIndex.first_time(self.log.path)))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ir a hora", str(e), parent=self)
+            return
+        line = self.log.line_at_offset(offset)
+        if line is None:
+            messagebox.showinfo("Ir a hora", "El índice de líneas todavía no ha llegado a esa hora; "
+                                             "inténtelo de nuevo en unos segundos.", parent=self)
+            return
+        self._goto_line(line)
+
+    def _scroll_lines(self, delta: int) -> str:
+        self._goto_line(self.top_line + delta)
+        return "break"
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        total = self.log.line_count()
+        if action == "moveto":
+            self._goto_line(int(float(amount) * total))
+        elif action == "scroll":
+            step = self._visible_lines() if unit == "pages" else 1
+            self._goto_line(self.top_line + int(amount) * step)
+
+    def _render(self) -> None:
+        # Solo se reescribe el Text si cambia lo que muestra; así no se pierde la selección en cada refresco
+        visible = self._visible_lines()
+        total = max(1, self.log.line_count())
+        self.scroll.set(self.top_line / total, min(1.0, (self.top_line + visible) / total))
+        view = (self.top_line, self.log.size, visible)
+        if view == self.rendered: return
+        self.rendered = view
+        lines = self.log.lines(self.top_line, visible)
+        self.text.config(state='normal')
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", '\n'.join(lines))
+        self.text.config(state='disabled')
+
+    def _refresh(self) -> None:
+        # Mientras se indexa (o el log crece) se actualizan el total y, si se está al final, la ventana
+        total = self.log.line_count()
+        indexing = "" if self.log.complete else \
+            f"  ·  indexando {self.log.indexed_bytes * 100 // max(1, self.log.size)} %"
+        self.title(f"Visor de log - {self.log.path.name}")
+        self.status_var.set(f"Líneas {self.top_line + 1}-{min(total, self.top_line + self._visible_lines())} "
+                            f"de {total}  ·  {self.log.size / 2 ** 20:.1f} MB{indexing}")
+        if self.follow_end:
+            self._goto_line(total)
+        else:
+            self._render()
+        self.refresh_id = self.after(self.REFRESH_MS, self._refresh)
+
+    def _on_close(self) -> None:
+        self.after_cancel(self.refresh_id)
+        self.log.close()
+        self.destroy()
+
+
 class SerialLoggerApp(tk.Tk):
     VERSION = "2.0.2"
     THEME_COLORS = {
@@ -391,23 +2699,55 @@ class SerialLoggerApp(tk.Tk):
                  "ctrl_fg": "#499C98", "search_bg": "#565600"}
     }
     CONTROL_CHAR_MAP = {'\r': '[CR]', '\n': '[LF]\n', '\t': '[TAB]'}
-    DECODERS: Dict[str, Callable[[Union[str, bytes]], str]] = {
-        "NMEA-0183": parse_nmea_sentence,
-        "Modbus-RTU": parse_modbus_rtu,
-        "CAN-ASCII": parse_can_ascii,
-        "JSON-line": parse_json_line
+    CONTROL_CHAR_RE = re.compile(r'([\r\n\t])')
+    CONTROL_TOKEN_RE = re.compile(r'(\[CR\]|\[LF\]|\[TAB\])')
+    SCROLLBACK_LINES = 10000
+    FRAME_MIN_MS = 16
+    FRAME_MAX_MS = 250
+    FRAME_BUDGET_S = 0.010
+    SINK_JOIN_TIMEOUT = 5.0  # s; espera al cierre de log y captura (último volcado, fsync, compresión)
+    # El logger no pierde datos por defecto (frena al lector si no da abasto); el visor prefiere saltar al presente
+    QUEUE_DEFAULTS: Dict[str, Tuple[int, str]] = {
+        "display": (2048, "coalesce"),
+        "logger": (1024, "block"),
+        "decoder": (1024, "drop-oldest"),
+        "decoded": (4096, "drop-oldest"),
+        "capture": (4096, "block"),
     }
 
     def __init__(self):
         super().__init__()
         # --- Variables y colas ---
-        self.gui_queue: queue.Queue[bytes] = queue.Queue()
-        self.log_queue: queue.Queue[Optional[bytes]] = queue.Queue()
-        self.decoded_queue: queue.Queue[str] = queue.Queue()
-        self.handler = SerialHandler(output_callback=self.gui_queue.put)
-        self.log_writer_thread: Optional[threading.Thread] = None
+        self.decoded_queue = BoundedQueue(*self.QUEUE_DEFAULTS["decoded"])
+        self.port_manager = SerialPortManager()
+        # Visor, logger y decodificador se suscriben cada uno con su propia cola al DataBus de los puertos
+        self.display_subscription: Optional[Subscription] = None
+        self.subscriptions: List[Subscription] = []
+        # Refresco de la GUI: frecuencia adaptativa entre FRAME_MIN_MS (con datos) y FRAME_MAX_MS (en reposo)
+        self.pending_chunks: Deque[Chunk] = deque()
+        self.refresh_id: Optional[str] = None
+        self.frame_interval = self.FRAME_MIN_MS
+        self.sink_threads: List[threading.Thread] = []
         self.print_log_flag = False
         self.start_of_line = True
+        self.display_port_id: Optional[int] = None
+        # Con un decodificador binario (framing "stream" o "frame") lo recibido se muestra en HEX
+        self.display_binary = False
+        # Un decoder incremental por (puerto, tag) durante toda la sesión: las secuencias multibyte y los CR+LF
+        # partidos entre dos lecturas no se corrompen. Se reinician al limpiar o cambiar el encoding.
+        self.display_states: Dict[Tuple[Optional[int], str], PortLineState] = {}
+        # El panel de recepción muestra como mucho scrollback_lines; lo anterior se recupera del ScrollbackStore
+        self.scrollback = ScrollbackStore()
+        self.scrollback_first = 0
+        self.scrollback_lines = self.SCROLLBACK_LINES
+        self.scrollback_paging = False
+        # Procesos para decodificar en paralelo (0 = en el propio hilo de decodificación)
+        self.decode_workers = 0
+        # Política de volcado del log ([Log] en settings.ini) y el escritor activo, para el resumen de estado
+        self.log_policy: Dict[str, Any] = {'flush_bytes': 64 * 1024, 'flush_ms': 1000, 'flush_on_idle': True,
+                                           'fsync_ms': 0, 'rotate_bytes': 0, 'rotate_seconds': 0,
+                                           'compression': "none", 'retain_bytes': 0, 'time_index': True}
+        self.log_writer: Optional[LogWriter] = None
         self.command_history: Deque[str] = deque(maxlen=50)
         self.history_index = -1
         self.periodic_send_id: Optional[str] = None
@@ -455,6 +2795,8 @@ class SerialLoggerApp(tk.Tk):
         file_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Archivo", menu=file_menu)
         file_menu.add_command(label="Guardar Buffer...", command=self._save_buffer, accelerator="Ctrl+S")
+        file_menu.add_command(label="Reproducir Captura...", command=self._replay_capture)
+        file_menu.add_command(label="Abrir Log Grande...", command=self._open_log_viewer)
         file_menu.add_separator()
         file_menu.add_command(label="Salir", command=self._on_closing)
         self.bind_all("<Control-s>", lambda e: self._save_buffer())
@@ -478,6 +2820,8 @@ class SerialLoggerApp(tk.Tk):
         help_menu.add_command(label="Info", command=self._show_info)
 
     def _create_widgets(self):
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.status_var, anchor="w").pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=(0, 5))
         main_pane = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
         main_pane.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
         left_panel = self._create_left_panel(main_pane)
@@ -506,7 +2850,7 @@ class SerialLoggerApp(tk.Tk):
         ttk.Label(output_header_frame, text="Protocolo:").pack(side="left", padx=(0, 5))
         self.protocol_selector_var = tk.StringVar(value="None")
         self.cb_protocol_selector = ttk.Combobox(output_header_frame, textvariable=self.protocol_selector_var,
-                                                 values=["None"] + list(self.DECODERS.keys()), state="readonly",
+                                                 values=["None"] + DECODER_REGISTRY.names(), state="readonly",
                                                  width=15)
         self.cb_protocol_selector.pack(side="left")
 
@@ -523,7 +2867,9 @@ class SerialLoggerApp(tk.Tk):
 
         self.output_notebook = ttk.Notebook(left_panel)
         self.output_notebook.grid(row=2, column=0, sticky="nsew")
-        self.ta_log_panel, _ = self._create_text_panel(self.output_notebook, "Salida Raw")
+        self.output_notebook.bind("<<NotebookTabChanged>>", lambda event: self._schedule_refresh(0))
+        self.ta_log_panel, self.log_scroll = self._create_text_panel(self.output_notebook, "Salida Raw")
+        self.ta_log_panel.config(yscrollcommand=self._on_log_scroll)
         self.ta_decoded_panel, _ = self._create_text_panel(self.output_notebook, "Protocolo Decodificado")
 
         input_frame = ttk.LabelFrame(left_panel, text="Entrada de Comandos", padding=5)
@@ -577,6 +2923,10 @@ class SerialLoggerApp(tk.Tk):
         self.tf_logfile.grid(row=0, column=1, sticky="ew", padx=5)
         self.bt_fileselector = ttk.Button(log_file_frame, text="...", width=4, command=self._choose_logfile)
         self.bt_fileselector.grid(row=0, column=2, sticky="e")
+        self.capture_var = tk.BooleanVar()
+        self.ck_capture = ttk.Checkbutton(log_file_frame, text="Captura binaria RX/TX (.slcap)",
+                                          variable=self.capture_var)
+        self.ck_capture.grid(row=1, column=0, columnspan=3, sticky="w")
 
         return left_panel
 
@@ -589,12 +2939,16 @@ class SerialLoggerApp(tk.Tk):
         self.dtr_var = tk.BooleanVar(value=True)
         self.ck_dtr = ttk.Checkbutton(top_buttons_frame, text="DTR Auto-Reset", variable=self.dtr_var)
         self.ck_dtr.pack(side="left", fill="x", expand=True)
+        self.reconnect_var = tk.BooleanVar(value=False)
+        self.ck_reconnect = ttk.Checkbutton(top_buttons_frame, text="Reconexión auto", variable=self.reconnect_var)
+        self.ck_reconnect.pack(side="left", fill="x", expand=True)
         params_frame = ttk.LabelFrame(right_panel, text="Parámetros Serie")
         params_frame.grid(row=1, column=0, sticky="ew")
         params_frame.columnconfigure(1, weight=1)
         self.cb_baud = self._create_param_combobox(params_frame, "Baud:", 0,
                                                    ["300", "600", "1200", "2400", "4800", "9600", "19200", "38400",
-                                                    "57600", "115200"])
+                                                    "57600", "115200", "230400", "460800", "921600", "1000000",
+                                                    "2000000", "3000000", "4000000"])
         self.cb_databits = self._create_param_combobox(params_frame, "Data Bits:", 1, ["5", "6", "7", "8"],
                                                        readonly=True)
         self.cb_stopbits = self._create_param_combobox(params_frame, "Stop Bits:", 2, ["1", "1.5", "2"], readonly=True)
@@ -603,6 +2957,7 @@ class SerialLoggerApp(tk.Tk):
         self.cb_handshake = self._create_param_combobox(params_frame, "Handshake:", 4, ["none", "RTS/CTS", "XON/XOFF"],
                                                         readonly=True)
         self.encoding_var = tk.StringVar(value='utf-8')
+        self.encoding_var.trace_add('write', lambda *args: self.display_states.clear())
         ttk.Label(params_frame, text="Encoding:").grid(row=5, column=0, sticky="w", padx=5, pady=2)
         self.cb_encoding = ttk.Combobox(params_frame, textvariable=self.encoding_var, width=15,
                                         values=['utf-8', 'ascii', 'latin-1', 'cp1252'])
@@ -696,7 +3051,7 @@ class SerialLoggerApp(tk.Tk):
             try:
                 clean_hex = "".join(data_to_send_str.split())
                 data_to_write = bytes.fromhex(clean_hex)
-                success, message = self.handler.write_data(data_to_write)
+                success, message = self.port_manager.write_data(data_to_write)
                 if success: self._display_text(data_to_write, None, "sent")
             except ValueError:
                 messagebox.showerror("Error de Formato", "El texto introducido no es hexadecimal válido.")
@@ -705,7 +3060,7 @@ class SerialLoggerApp(tk.Tk):
             line_ending_map = {"None": "", "NL (\\n)": "\n", "CR (\\r)": "\r", "CR+LF (\\r\\n)": "\r\n"}
             line_ending = line_ending_map.get(self.line_ending_var.get(), "")
             data_to_write = data_to_send_str + line_ending
-            success, message = self.handler.write_data(data_to_write, self.encoding_var.get())
+            success, message = self.port_manager.write_data(data_to_write, self.encoding_var.get())
             if success: self._display_text(None, data_to_write, "sent")
 
         if success:
@@ -773,6 +3128,7 @@ class SerialLoggerApp(tk.Tk):
         self.cb_parity.set(self.app_config.get(Cfg.SEC_SERIAL, Cfg.KEY_PARITY, fallback="none"))
         self.cb_handshake.set(self.app_config.get(Cfg.SEC_SERIAL, Cfg.KEY_HANDSHAKE, fallback="none"))
         self.dtr_var.set(self.app_config.getboolean(Cfg.SEC_SERIAL, Cfg.KEY_DTR_RESET, fallback=True))
+        self.reconnect_var.set(self.app_config.getboolean(Cfg.SEC_SERIAL, Cfg.KEY_RECONNECT, fallback=False))
         self.encoding_var.set(self.app_config.get(Cfg.SEC_SERIAL, Cfg.KEY_ENCODING, fallback='utf-8'))
 
         self.cb_timestamp.set(self.app_config.get(Cfg.SEC_LOG, Cfg.KEY_TIMESTAMP, fallback="none"))
@@ -780,6 +3136,7 @@ class SerialLoggerApp(tk.Tk):
         self.tf_logfile.delete(0, tk.END)
         self.tf_logfile.insert(0, self.app_config.get(Cfg.SEC_LOG, Cfg.KEY_FILE, fallback=str(self.std_logfile_name)))
         self.ck_logfile_var.set(self.app_config.getboolean(Cfg.SEC_LOG, Cfg.KEY_ENABLED, fallback=False))
+        self.capture_var.set(self.app_config.getboolean(Cfg.SEC_LOG, Cfg.KEY_CAPTURE, fallback=False))
 
         self.line_ending_var.set(self.app_config.get(Cfg.SEC_UI, Cfg.KEY_LINE_ENDING, fallback="CR+LF (\\r\\n)"))
         self.hex_view_var.set(self.app_config.getboolean(Cfg.SEC_UI, Cfg.KEY_HEX_VIEW, fallback=False))
@@ -788,6 +3145,19 @@ class SerialLoggerApp(tk.Tk):
         self.autoscroll_var.set(self.app_config.getboolean(Cfg.SEC_UI, Cfg.KEY_AUTOSCROLL, fallback=True))
         self.show_control_chars_var.set(
             self.app_config.getboolean(Cfg.SEC_UI, Cfg.KEY_SHOW_CTRL_CHARS, fallback=True))
+        self.scrollback_lines = max(100, self.app_config.getint(Cfg.SEC_UI, Cfg.KEY_SCROLLBACK_LINES,
+                                                                fallback=self.SCROLLBACK_LINES))
+        self.decode_workers = max(0, self.app_config.getint(Cfg.SEC_UI, Cfg.KEY_DECODE_WORKERS, fallback=0))
+        self.log_policy = {
+            'flush_bytes': max(1, self.app_config.getint(Cfg.SEC_LOG, Cfg.KEY_FLUSH_BYTES, fallback=64 * 1024)),
+            'flush_ms': max(0, self.app_config.getint(Cfg.SEC_LOG, Cfg.KEY_FLUSH_MS, fallback=1000)),
+            'flush_on_idle': self.app_config.getboolean(Cfg.SEC_LOG, Cfg.KEY_FLUSH_ON_IDLE, fallback=True),
+            'fsync_ms': max(0, self.app_config.getint(Cfg.SEC_LOG, Cfg.KEY_FSYNC_MS, fallback=0)),
+            'rotate_bytes': int(self.app_config.getfloat(Cfg.SEC_LOG, Cfg.KEY_ROTATE_MB, fallback=0) * 2 ** 20),
+            'rotate_seconds': self.app_config.getint(Cfg.SEC_LOG, Cfg.KEY_ROTATE_MINUTES, fallback=0) * 60,
+            'compression': self.app_config.get(Cfg.SEC_LOG, Cfg.KEY_COMPRESSION, fallback="none"),
+            'retain_bytes': int(self.app_config.getfloat(Cfg.SEC_LOG, Cfg.KEY_RETAIN_MB, fallback=0) * 2 ** 20),
+            'time_index': self.app_config.getboolean(Cfg.SEC_LOG, Cfg.KEY_TIME_INDEX, fallback=True)}
 
         self._toggle_delimiter()
 
@@ -805,6 +3175,7 @@ class SerialLoggerApp(tk.Tk):
         self.app_config.set(Cfg.SEC_SERIAL, Cfg.KEY_PARITY, self.cb_parity.get())
         self.app_config.set(Cfg.SEC_SERIAL, Cfg.KEY_HANDSHAKE, self.cb_handshake.get())
         self.app_config.set(Cfg.SEC_SERIAL, Cfg.KEY_DTR_RESET, str(self.dtr_var.get()))
+        self.app_config.set(Cfg.SEC_SERIAL, Cfg.KEY_RECONNECT, str(self.reconnect_var.get()))
         self.app_config.set(Cfg.SEC_SERIAL, Cfg.KEY_ENCODING, self.encoding_var.get())
 
         if not self.app_config.has_section(Cfg.SEC_LOG): self.app_config.add_section(Cfg.SEC_LOG)
@@ -812,6 +3183,16 @@ class SerialLoggerApp(tk.Tk):
         self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_DELIMITER, self.cb_delimiter.get())
         self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_FILE, self.tf_logfile.get())
         self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_ENABLED, str(self.ck_logfile_var.get()))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_CAPTURE, str(self.capture_var.get()))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_FLUSH_BYTES, str(self.log_policy['flush_bytes']))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_FLUSH_MS, str(self.log_policy['flush_ms']))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_FLUSH_ON_IDLE, str(self.log_policy['flush_on_idle']))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_FSYNC_MS, str(self.log_policy['fsync_ms']))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_ROTATE_MB, f"{self.log_policy['rotate_bytes'] / 2 ** 20:g}")
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_ROTATE_MINUTES, str(self.log_policy['rotate_seconds'] // 60))
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_COMPRESSION, self.log_policy['compression'])
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_RETAIN_MB, f"{self.log_policy['retain_bytes'] / 2 ** 20:g}")
+        self.app_config.set(Cfg.SEC_LOG, Cfg.KEY_TIME_INDEX, str(self.log_policy['time_index']))
 
         if not self.app_config.has_section(Cfg.SEC_UI): self.app_config.add_section(Cfg.SEC_UI)
         self.app_config.set(Cfg.SEC_UI, Cfg.KEY_THEME, self.current_theme)
@@ -822,48 +3203,108 @@ class SerialLoggerApp(tk.Tk):
         self.app_config.set(Cfg.SEC_UI, Cfg.KEY_AUTOSCROLL, str(self.autoscroll_var.get()))
         self.app_config.set(Cfg.SEC_UI, Cfg.KEY_SHOW_CTRL_CHARS,
                             str(self.show_control_chars_var.get()))
+        self.app_config.set(Cfg.SEC_UI, Cfg.KEY_SCROLLBACK_LINES, str(self.scrollback_lines))
+        self.app_config.set(Cfg.SEC_UI, Cfg.KEY_DECODE_WORKERS, str(self.decode_workers))
+
+        if not self.app_config.has_section(Cfg.SEC_QUEUES): self.app_config.add_section(Cfg.SEC_QUEUES)
+        for name in self.QUEUE_DEFAULTS:
+            size, policy = self._queue_settings(name)
+            self.app_config.set(Cfg.SEC_QUEUES, Cfg.KEY_QUEUE_SIZE.format(name), str(size))
+            self.app_config.set(Cfg.SEC_QUEUES, Cfg.KEY_QUEUE_POLICY.format(name), policy)
 
         with open(self.config_file, 'w') as configfile:
             self.app_config.write(configfile)
 
-    def open_port(self):
+    def _queue_settings(self, name: str) -> Tuple[int, str]:
+        size, policy = self.QUEUE_DEFAULTS[name]
+        size = self.app_config.getint(Cfg.SEC_QUEUES, Cfg.KEY_QUEUE_SIZE.format(name), fallback=size)
+        policy = self.app_config.get(Cfg.SEC_QUEUES, Cfg.KEY_QUEUE_POLICY.format(name), fallback=policy)
+        if policy not in BoundedQueue.POLICIES: policy = self.QUEUE_DEFAULTS[name][1]
+        return size, policy
+
+    def open_port(self, replay: Optional[CaptureReplay] = None):
         self._clear_output()
         config = {
-            'port': self.cb_commport.get(), 'baud': self.cb_baud.get(), 'databits': self.cb_databits.get(),
+            'baud': self.cb_baud.get(), 'databits': self.cb_databits.get(),
             'stopbits': self.cb_stopbits.get(), 'parity': self.cb_parity.get(), 'handshake': self.cb_handshake.get(),
-            'dtr': self.dtr_var.get(), 'protocol': self.protocol_selector_var.get()
+            'dtr': self.dtr_var.get(), 'protocol': self.protocol_selector_var.get(),
+            'reconnect': self.reconnect_var.get()
         }
-        if not config['port']:
+        config['framing'] = DECODER_REGISTRY.framing(config['protocol'])
+        self.display_binary = config['framing'] in ("stream", "frame")
+        # Se pueden capturar varios puertos a la vez separándolos por comas (ej. "COM3, COM4")
+        ports = [port.strip() for port in self.cb_commport.get().split(',') if port.strip()]
+        if replay:
+            # La reproducción ocupa el lugar de los puertos: mismo bus, mismos consumidores
+            self.port_manager, ports = replay, []
+        elif not ports:
             messagebox.showerror("Error", "No se ha seleccionado un puerto COM.")
             return
-
-        success, message = self.handler.open_port(config)
+        elif not isinstance(self.port_manager, SerialPortManager):
+            self.port_manager = SerialPortManager()
+
+        # Las suscripciones se crean antes de abrir para no perder los primeros datos
+        bus = self.port_manager.bus
+        self.display_subscription = bus.subscribe("display", None, *self._queue_settings("display"))
+        self.subscriptions = [self.display_subscription]
+        sinks = []
+        if self.ck_logfile_var.get():
+            sinks.append((bus.subscribe("logger", None, *self._queue_settings("logger")), self._log_task))
+        if self.capture_var.get() and not replay:
+            sinks.append((bus.subscribe("capture", None, *self._queue_settings("capture"), tx=True),
+                          self._capture_task))
+        if config['protocol'] != "None":
+            size, policy = self._queue_settings("decoder")
+            # Al reproducir no hay prisa por el presente: el decodificador no pierde nada y la reproducción lo espera
+            if replay: policy = "block"
+            sinks.append((bus.subscribe("decoder", None, size, policy), self._decode_task))
+            self.decoded_queue = BoundedQueue(*self._queue_settings("decoded"))
+        self.subscriptions += [subscription for subscription, _ in sinks]
+
+        success, message = self.port_manager.open_ports([dict(config, port=port) for port in ports])
         if not success:
+            for subscription in self.subscriptions: subscription.close()
             messagebox.showerror("Error de Puerto Serie", message)
             return
 
         self.start_of_line = True
+        self.display_port_id = None
         self._toggle_connection_state(connected=True)
-        self.after(50, self._process_gui_queue)
-
-        if self.ck_logfile_var.get() or self.protocol_selector_var.get() != "None":
-            self.print_log_flag = True
-            self.log_writer_thread = threading.Thread(target=self._log_and_decode_task, daemon=True)
-            self.log_writer_thread.start()
-            self.after(50, self._process_decoded_queue)
+        self.pending_chunks.clear()
+        self.frame_interval = self.FRAME_MIN_MS
+        self._schedule_refresh(self.FRAME_MIN_MS)
+
+        # Los hilos trabajan con una copia de la configuración: no consultan widgets Tk mientras capturan
+        session = {'encoding': self.encoding_var.get(), 'timestamp': self.cb_timestamp.get(),
+                   'delimiter': self.cb_delimiter.get(), 'protocol': config['protocol'], 'framing': config['framing'],
+                   'decode_workers': self.decode_workers, 'log_policy': dict(self.log_policy),
+                   'port_names': self.port_manager.port_names, 'logfile': self.tf_logfile.get(),
+                   'capture': str(Path(self.tf_logfile.get()).with_suffix('.slcap')),
+                   'wall_offset_ns': self.port_manager.wall_offset_ns}
+        self.sink_threads = [threading.Thread(target=task, args=(subscription, session), daemon=True)
+                             for subscription, task in sinks]
+        for thread in self.sink_threads: thread.start()
+        if sinks: self.print_log_flag = True
 
     def close_port(self):
         if self.periodic_send_id: self._toggle_periodic_send()
-        self.handler.close_port()
-        self.log_queue.put(None)
+        self.port_manager.close_ports()
+        # Cada hilo drena su propia cola y cierra su archivo; se espera a que terminen porque son daemon y una
+        # salida inmediata del intérprete cortaría el último volcado, el fsync o la compresión pendiente
+        for subscription in self.subscriptions: subscription.close()
+        deadline = time.monotonic() + self.SINK_JOIN_TIMEOUT
+        for thread in self.sink_threads: thread.join(max(0.0, deadline - time.monotonic()))
+        self.sink_threads = []
+        self._update_status()
         self._toggle_connection_state(connected=False)
 
     def _toggle_connection_state(self, connected: bool):
         state_if_disconnected = "normal"
         state_if_connected = "disabled"
-        for widget in [self.cb_commport, self.bt_update, self.cb_baud, self.cb_databits, self.ck_dtr,
+        for widget in [self.cb_commport, self.bt_update, self.cb_baud, self.cb_databits, self.ck_dtr, self.ck_reconnect,
                        self.cb_stopbits, self.cb_parity, self.cb_handshake, self.cb_encoding,
-                       self.cb_protocol_selector, self.tf_logfile, self.bt_fileselector, self.ck_logfile]:
+                       self.cb_protocol_selector, self.tf_logfile, self.bt_fileselector, self.ck_logfile,
+                       self.ck_capture]:
             widget.config(state=state_if_connected if connected else "normal")
         for widget in [self.cb_databits, self.cb_stopbits, self.cb_parity, self.cb_handshake,
                        self.cb_protocol_selector]:
@@ -879,53 +3320,106 @@ class SerialLoggerApp(tk.Tk):
         self.bt_toggle_repeat.config(state="normal" if connected else "disabled")
 
     # *** SOLUCIÓN 1 (RESTAURADA): _display_text para normalizar finales de línea en tiempo real ***
-    def _display_text(self, raw_data: Optional[bytes], text_data: Optional[str], tag: str):
-        self.ta_log_panel.config(state='normal')
+    def _display_text(self, raw_data: Optional[bytes], text_data: Optional[str], tag: str,
+                      wall_ns: Optional[int] = None, port_id: Optional[int] = None):
+        self._render_segments(self._build_segments(raw_data, text_data, tag, wall_ns, port_id))
+
+    def _build_segments(self, raw_data: Optional[bytes], text_data: Optional[str], tag: str,
+                        wall_ns: Optional[int] = None, port_id: Optional[int] = None) -> List[Any]:
+        # Devuelve (texto, tags, texto, tags, ...) listo para un único insert(END, *segments)
+        segments: List[Any] = []
+        port_tag = ""
+        if port_id is not None and len(self.port_manager.port_names) > 1:
+            port_tag = f"[{self.port_manager.port_names[port_id]}] "
+            # Una línea a medias de otro puerto se cierra para no mezclar los flujos
+            if port_id != self.display_port_id and not self.start_of_line:
+                segments += ['\n', tag]
+                self.start_of_line = True
+            self.display_port_id = port_id
 
         display_string = ""
         is_hex = self.hex_view_var.get()
 
         if raw_data:
-            if is_hex or self.protocol_selector_var.get() == "Modbus-RTU":
+            if is_hex or self.display_binary:
                 display_string = ' '.join(f'{b:02X}' for b in raw_data) + ' '
             else:
-                decoded_text = codecs.getincrementaldecoder(self.encoding_var.get())(errors='replace').decode(raw_data)
+                state = self.display_states.get((port_id, tag))
+                if state is None:
+                    state = self.display_states[(port_id, tag)] = PortLineState(self.encoding_var.get())
+                decoded_text = state.decoder.decode(raw_data)
+                if decoded_text:
+                    if state.skip_lf and decoded_text[0] == '\n': decoded_text = decoded_text[1:]
+                    state.skip_lf = decoded_text.endswith('\r')
                 # Normaliza todos los tipos de salto de línea a \n para evitar artefactos
                 display_string = decoded_text.replace('\r\n', '\n').replace('\r', '\n')
         elif text_data:  # Para datos enviados
             display_string = text_data
 
-        for char in display_string:
+        # El texto se trocea en tramos (prefijo de línea, texto plano, caracteres de control); el texto plano
+        # consecutivo se acumula en run y se emite como un único segmento
+        show_ctrl = self.show_control_chars_var.get() and not is_hex
+        prefix: Optional[str] = None
+        run: List[str] = []
+        for token in self.CONTROL_CHAR_RE.split(display_string):
+            if not token: continue
             if self.start_of_line:
-                timestamp = get_timestamp(self.cb_timestamp.get(), self.cb_delimiter.get())
-                if timestamp: self.ta_log_panel.insert(tk.END, timestamp, "received")
+                if prefix is None:
+                    prefix = get_timestamp(self.cb_timestamp.get(), self.cb_delimiter.get(), wall_ns) + port_tag
+                if prefix:
+                    if run: segments += [''.join(run), tag]; run = []
+                    segments += [prefix, "received"]
                 self.start_of_line = False
-
-            # La opción de ver caracteres de control sigue funcionando
-            if self.show_control_chars_var.get() and char in self.CONTROL_CHAR_MAP and not is_hex:
-                self.ta_log_panel.insert(tk.END, self.CONTROL_CHAR_MAP[char], ("control_char", tag))
+            if show_ctrl and token in self.CONTROL_CHAR_MAP:
+                if run: segments += [''.join(run), tag]; run = []
+                segments += [self.CONTROL_CHAR_MAP[token], ("control_char", tag)]
             else:
-                self.ta_log_panel.insert(tk.END, char, tag)
-
-            if char == '\n':
+                run.append(token)
+            if token == '\n':
                 self.start_of_line = True
+        if run: segments += [''.join(run), tag]
+        if segments: self.scrollback.append(''.join(segments[0::2]), tag)
+        return segments
 
+    def _render_segments(self, segments: List[Any]):
+        if not segments: return
+        self.ta_log_panel.config(state='normal')
+        self.ta_log_panel.insert(tk.END, *segments)
+        self._trim_scrollback()
         if self.autoscroll_var.get():
             self.ta_log_panel.see(tk.END)
         self.ta_log_panel.config(state='disabled')
 
-    def _process_decoded_queue(self):
-        try:
-            while not self.decoded_queue.empty():
-                decoded_line = self.decoded_queue.get_nowait()
-                self.ta_decoded_panel.config(state='normal')
-                self.ta_decoded_panel.insert(tk.END, decoded_line)
-                if self.autoscroll_var.get():
-                    self.ta_decoded_panel.see(tk.END)
-                self.ta_decoded_panel.config(state='disabled')
-        except queue.Empty:
-            pass
-        if self.handler.is_reading.is_set(): self.after(50, self._process_decoded_queue)
+    def _trim_scrollback(self):
+        # Se recorta la cabeza del widget en lotes grandes (20% del límite), no línea a línea
+        excess = self.scrollback.line_count - self.scrollback_first - self.scrollback_lines
+        if excess < self.scrollback_lines // 5: return
+        # Sin auto-scroll no se borra la zona que el usuario está leyendo; se recortará cuando salga de ella
+        top_line = int(self.ta_log_panel.index('@0,0').split('.')[0]) - 1
+        if not self.autoscroll_var.get() and top_line < excess: return
+        self.ta_log_panel.delete('1.0', f'{excess + 1}.0')
+        self.scrollback_first += excess
+
+    def _on_log_scroll(self, first: str, last: str):
+        self.log_scroll.set(first, last)
+        if float(first) <= 0.0 and self.scrollback_first > 0 and not self.scrollback_paging:
+            self.scrollback_paging = True
+            self.after_idle(self._page_in_scrollback)
+
+    def _page_in_scrollback(self):
+        # Al llegar arriba del todo se recupera del historial la página anterior, manteniendo la vista en su sitio
+        self.scrollback_paging = False
+        start = max(0, self.scrollback_first - self.scrollback_lines // 5)
+        if start >= self.scrollback_first: return
+        segments: List[Any] = []
+        for line, tag in self.scrollback.lines(start, self.scrollback_first):
+            for token in self.CONTROL_TOKEN_RE.split(line):
+                if token: segments += [token, ("control_char", tag) if self.CONTROL_TOKEN_RE.fullmatch(token) else tag]
+        self.ta_log_panel.config(state='normal')
+        self.ta_log_panel.insert('1.0', *segments)
+        self.ta_log_panel.config(state='disabled')
+        self.ta_log_panel.yview(f'{self.scrollback_first - start + 1}.0')
+        self.scrollback_first = start
 
     def _set_defaults(self):
         self.cb_baud.set("9600");
@@ -952,7 +3446,9 @@ class SerialLoggerApp(tk.Tk):
             elif response is None:
                 return
         self._save_settings()
-        if self.handler.is_reading.is_set(): self.close_port()
+        # Siempre: tras una desconexión sin reconexión o al acabar una reproducción el lector ya no está activo,
+        # pero los hilos de log y captura pueden seguir con datos por escribir
+        self.close_port()
         self.destroy()
 
     def _show_info(self):
@@ -966,46 +3462,95 @@ class SerialLoggerApp(tk.Tk):
                             "Traducción y mejoras por AI\n\n"
                             "Licencia: GNU Public License 3.0")
 
-    def _log_and_decode_task(self):
-        print("Hilo de log/decode iniciado.")
-        line_buffer = '';
-        decoder = codecs.getincrementaldecoder(self.encoding_var.get())(errors='replace')
-        log_to_file = self.ck_logfile_var.get();
-        protocol = self.protocol_selector_var.get()
-        parser = self.DECODERS.get(protocol)
-        logfile = None
-        if log_to_file:
-            log_filename = self.tf_logfile.get()
-            try:
-                logfile = open(log_filename, 'a', encoding='utf-8')
-            except IOError as e:
-                print(f"Error al escribir en el log: {e}");
-                log_to_file = False
-        while True:
-            raw_chunk = self.log_queue.get()
-            if raw_chunk is None: break
-            if protocol == "Modbus-RTU":
-                if parser:
-                    decoded_line = parser(raw_chunk)
-                    self.decoded_queue.put(decoded_line)
-                    if log_to_file and logfile:
-                        timestamp = get_timestamp(self.cb_timestamp.get(), self.cb_delimiter.get())
-                        logfile.write(f"{timestamp}{decoded_line}")
-                continue
-            decoded_string = decoder.decode(raw_chunk)
-            line_buffer += decoded_string
-            while '\n' in line_buffer:
-                line, line_buffer = line_buffer.split('\n', 1)
-                full_line = line + '\n'
-                if log_to_file and logfile:
-                    timestamp = get_timestamp(self.cb_timestamp.get(), self.cb_delimiter.get())
-                    logfile.write(f"{timestamp}{line}\n");
-                    logfile.flush()
-                if parser:
-                    decoded_line = parser(full_line)
-                    self.decoded_queue.put(decoded_line)
-        if logfile: logfile.close()
-        print("Hilo de log/decode terminado.")
+    def _log_task(self, subscription: Subscription, session: Dict[str, Any]):
+        print("Hilo de log iniciado.")
+        try:
+            logfile = self.log_writer = LogWriter(session['logfile'], **session['log_policy'])
+        except IOError as e:
+            print(f"Error al escribir en el log: {e}");
+            subscription.close(discard=True)
+            return
+        port_names = session['port_names']
+        multi_port = len(port_names) > 1
+        framers: Dict[int, LineFramer] = {}
+        # Con un protocolo binario se registran las tramas decodificadas en lugar del texto crudo
+        decoder_session = None
+        if session['framing'] in ("stream", "frame"):
+            decoder_session = DecoderSession(session['protocol'], session['encoding'], port_names)
+
+        def write_records(records: List[DecodedRecord]):
+            for record in records:
+                timestamp = get_timestamp(session['timestamp'], session['delimiter'], record.timestamp)
+                port_tag = f"[{record.port}] " if record.port else ""
+                logfile.write(f"{timestamp}{port_tag}{record.render()}", record.timestamp)
+
+        try:
+            while not subscription.closed:
+                # Espera como mucho hasta que toque volcar por intervalo; al vaciar la cola se considera ocioso
+                for chunk in subscription.get_batch(timeout=logfile.timeout()):
+                    port_tag = f"[{port_names[chunk.port_id]}] " if multi_port else ""
+                    if decoder_session:
+                        write_records(decoder_session.feed(chunk, subscription.confirm))
+                        # El aviso de corte no pasa por el decodificador, pero debe quedar en el log
+                        if chunk.direction == Chunk.EVENT:
+                            marker = bytes(chunk.data).decode('utf-8', errors='replace').strip()
+                            timestamp = get_timestamp(session['timestamp'], session['delimiter'], chunk.wall_ns)
+                            logfile.write(f"{timestamp}{port_tag}{marker}\n", chunk.wall_ns)
+                        continue
+                    framer = framers.get(chunk.port_id)
+                    if framer is None: framer = framers[chunk.port_id] = LineFramer(session['encoding'])
+                    lines = framer.feed(chunk.data, chunk.wall_ns)
+                    if not subscription.confirm(chunk) or not lines: continue
+                    # Cada línea lleva la hora de llegada del bloque en el que empezó; el lote va en un solo write
+                    first_prefix = get_timestamp(session['timestamp'], session['delimiter'], framer.batch_start_ns)
+                    prefix = get_timestamp(session['timestamp'], session['delimiter'], chunk.wall_ns)
+                    logfile.write(LineFramer.join(lines, first_prefix + port_tag, prefix + port_tag),
+                                  framer.batch_start_ns);
+                logfile.poll(idle=subscription.queue.empty())
+            if decoder_session: write_records(decoder_session.flush())
+            logfile.close()
+        except OSError as e:
+            # Sin disco no hay log: se abandona la suscripción para no dejar al lector bloqueado
+            print(f"Error al escribir en el log: {e}");
+            subscription.close(discard=True)
+        if subscription.lost_bytes:
+            print(f"Aviso: el logger perdió {subscription.lost_bytes} bytes (buffer circular desbordado).")
+        try:
+            logfile.close()
+        except OSError:
+            pass
+        print(f"Log: {logfile.stats_text()}")
+        print("Hilo de log terminado.")
+
+    def _capture_task(self, subscription: Subscription, session: Dict[str, Any]):
+        # Misma política de volcado y rotación que el log de texto, en <log>.slcap
+        try:
+            capture = CaptureWriter(session['capture'], session['port_names'], session['wall_offset_ns'],
+                                    **session['log_policy'])
+        except OSError as e:
+            print(f"Error al abrir la captura: {e}");
+            subscription.close(discard=True)
+            return
+        capture_task(subscription, capture)
+
+    def _decode_task(self, subscription: Subscription, session: Dict[str, Any]):
+        # Solo decodifica a registros; el texto lo genera el panel cuando está visible
+        print("Hilo de decodificación iniciado.")
+        decoder_session = DecoderSession(session['protocol'], session['encoding'], session['port_names'])
+        stage: Union[DecoderSession, ParallelDecodeStage] = decoder_session
+        probe = DECODER_REGISTRY.create(session['protocol'])
+        if session['decode_workers'] > 0 and probe and probe.STATELESS:
+            stage = ParallelDecodeStage(decoder_session, session['decode_workers'])
+        while not subscription.closed:
+            # Con lotes en vuelo no se bloquea indefinidamente: hay que recoger sus resultados
+            in_flight = isinstance(stage, ParallelDecodeStage) and stage.in_flight
+            for chunk in subscription.get_batch(timeout=0.05 if in_flight else None):
+                for record in stage.feed(chunk, subscription.confirm): self.decoded_queue.offer(record)
+            if isinstance(stage, ParallelDecodeStage):
+                stage.submit()
+                for record in stage.collect(): self.decoded_queue.offer(record)
+        for record in stage.flush(): self.decoded_queue.offer(record)
+        print("Hilo de decodificación terminado.")
 
     def _clear_output(self):
         self.ta_log_panel.config(state='normal');
@@ -1015,6 +3560,29 @@ class SerialLoggerApp(tk.Tk):
         self.ta_log_panel.config(state='disabled');
         self.ta_decoded_panel.config(state='disabled')
         self.start_of_line = True
+        self.display_states.clear()
+        self.scrollback.clear()
+        self.scrollback_first = 0
+
+    def _open_log_viewer(self):
+        filename = filedialog.askopenfilename(title="Abrir log", initialdir=Path(self.tf_logfile.get()).parent,
+                                              filetypes=[("Log files", "*.log"), ("Text files", "*.txt"),
+                                                         ("All files", "*.*")])
+        if not filename: return
+        try:
+            LogViewer(self, filename, self.THEME_COLORS[self.current_theme])
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Visor de log", f"No se pudo abrir {filename}:\n{e}")
+
+    def _replay_capture(self):
+        if self.port_manager.is_reading.is_set(): return
+        filename = filedialog.askopenfilename(title="Reproducir captura", initialdir=Path(self.tf_logfile.get()).parent,
+                                              filetypes=[("Capturas", "*.slcap"), ("All files", "*.*")])
+        if not filename: return
+        speed = simpledialog.askfloat("Reproducir captura", "Velocidad (1 = ritmo original, 0 = sin esperas):",
+                                      initialvalue=1.0, minvalue=0.0, parent=self)
+        if speed is None: return
+        self.open_port(replay=CaptureReplay(filename, speed))
 
     def _choose_logfile(self):
         filename = filedialog.asksaveasfilename(title="Especificar archivo de log", initialdir=Path.home(),
@@ -1029,7 +3597,7 @@ class SerialLoggerApp(tk.Tk):
         if not filename: return False
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write(self.ta_log_panel.get("1.0", "end-1c"))
+                self.scrollback.save(f)
             messagebox.showinfo("Guardado", f"Buffer guardado en {filename}");
             self.print_log_flag = True;
             return True
@@ -1061,16 +3629,71 @@ class SerialLoggerApp(tk.Tk):
             # Si no hay puertos, vaciamos la selección.
             self.cb_commport.set("")
 
-    def _process_gui_queue(self):
-        try:
-            while not self.gui_queue.empty():
-                raw_chunk = self.gui_queue.get_nowait()
-                if self.ck_logfile_var.get() or self.protocol_selector_var.get() != "None": self.log_queue.put(
-                    raw_chunk)
-                self._display_text(raw_chunk, None, "received")
-        except queue.Empty:
-            pass
-        if self.handler.is_reading.is_set(): self.after(50, self._process_gui_queue)
+    def _schedule_refresh(self, delay_ms: int):
+        if self.refresh_id: self.after_cancel(self.refresh_id)
+        self.refresh_id = self.after(delay_ms, self._refresh_gui)
+
+    def _refresh_gui(self):
+        # Un único render por frame: todo lo pendiente se junta en una sola inserción por panel, hasta agotar
+        # el presupuesto de tiempo del frame; lo que no cabe queda en pending_chunks para el siguiente
+        self.refresh_id = None
+        deadline = time.perf_counter() + self.FRAME_BUDGET_S
+        subscription = self.display_subscription
+        if subscription: self.pending_chunks.extend(subscription.get_batch(timeout=0))
+        segments: List[Any] = []
+        while self.pending_chunks and time.perf_counter() < deadline:
+            chunk = self.pending_chunks.popleft()
+            if not chunk.is_valid():
+                if subscription: subscription.lost_bytes += len(chunk.data)
+                continue
+            # El lector no espera al visor: se copia el bloque y se comprueba que seguía íntegro antes de tocar el
+            # estado del panel (historial, inicio de línea, decodificador de texto)
+            data = bytes(chunk.data)
+            if subscription and not subscription.confirm(chunk): continue
+            segments += self._build_segments(data, None, "received", chunk.wall_ns, chunk.port_id)
+        self._render_segments(segments)
+
+        # Los registros decodificados solo se convierten a texto con la pestaña visible; mientras tanto esperan
+        # en decoded_queue (acotada) sin coste de formateo
+        decoded_lines: List[str] = []
+        decoded_visible = self.output_notebook.select() == str(self.ta_decoded_panel.master)
+        while decoded_visible and (not decoded_lines or time.perf_counter() < deadline):
+            try:
+                record = self.decoded_queue.get_nowait()
+            except queue.Empty:
+                break
+            decoded_lines.append(f"[{record.port}] {record.render()}" if record.port else record.render())
+        if decoded_lines:
+            self.ta_decoded_panel.config(state='normal')
+            self.ta_decoded_panel.insert(tk.END, ''.join(decoded_lines))
+            if self.autoscroll_var.get():
+                self.ta_decoded_panel.see(tk.END)
+            self.ta_decoded_panel.config(state='disabled')
+        self._update_status()
+
+        # Con datos (o retraso acumulado) se refresca a 60 Hz; en reposo el intervalo se dobla hasta FRAME_MAX_MS
+        backlog = bool(self.pending_chunks) or (decoded_visible and not self.decoded_queue.empty())
+        if segments or decoded_lines or backlog:
+            self.frame_interval = self.FRAME_MIN_MS
+        else:
+            self.frame_interval = min(self.FRAME_MAX_MS, self.frame_interval * 2)
+        capturing = self.port_manager.is_reading.is_set() or (subscription is not None and not subscription.closed)
+        if capturing or backlog: self._schedule_refresh(self.frame_interval)
+
+    def _update_status(self):
+        # Bloques/bytes descartados por cada cola (política de desborde) o perdidos por el buffer circular
+        losses = [(sub.name, sub.dropped_chunks, sub.dropped_bytes + sub.lost_bytes) for sub in self.subscriptions]
+        text = "  ·  ".join(f"{name}: {chunks} bloques / {nbytes} B descartados"
+                            for name, chunks, nbytes in losses if chunks or nbytes)
+        text = text or "Sin pérdidas"
+        # decoded_queue solo alimenta la pestaña: lo que descarta con la pestaña oculta no es pérdida de datos
+        # (sigue íntegro en el log y la captura), solo registros que el panel no llegó a mostrar
+        if self.decoded_queue.dropped_items:
+            text += f"  ·  decodificados: {self.decoded_queue.dropped_items} registros no mostrados"
+        if self.log_writer and self.log_writer.flush_count:
+            text += (f"  ·  log: {self.log_writer.flush_count} volcados, "
+                     f"máx. {self.log_writer.flush_time_max * 1000:.1f} ms")
+        if self.status_var.get() != text: self.status_var.set(text)
 
     def _toggle_delimiter(self, event=None):
         if not hasattr(self, 'cb_timestamp'): return
@@ -1085,22 +3708,75 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description=f"SerialLogger v{SerialLoggerApp.VERSION} - Monitor de Puerto Serie con GUI y CLI.")
     parser.add_argument('--no-gui', action='store_true', help="Forzar la ejecución en modo consola (CLI).")
-    parser.add_argument('-p', '--port', type=str, help="Puerto serie a usar (ej. COM3, /dev/ttyUSB0).")
+    parser.add_argument('-p', '--port', type=str, nargs='+',
+                        help="Puerto(s) serie a usar (ej. COM3, /dev/ttyUSB0). Con varios, se capturan todos a la vez.")
     parser.add_argument('-b', '--baud', type=int, default=9600, help="Baud rate (defecto: 9600).")
     parser.add_argument('--databits', type=int, choices=[5, 6, 7, 8], default=8, help="Bits de datos (defecto: 8).")
     parser.add_argument('--stopbits', type=float, choices=[1, 1.5, 2], default=1, help="Bits de parada (defecto: 1).")
     parser.add_argument('--parity', type=str, choices=['none', 'even', 'odd', 'mark', 'space'], default='none',
                         help="Paridad (defecto: none).")
     parser.add_argument('--no-dtr', action='store_true', help="Desactivar el auto-reset por DTR (útil para Arduinos).")
+    parser.add_argument('--reconnect', action='store_true',
+                        help="Reabrir el puerto automáticamente (con backoff) si se desconecta.")
+    parser.add_argument('--usb-serial', type=str,
+                        help="Nº de serie USB del adaptador; al reconectar se busca por él aunque cambie de nombre.")
     parser.add_argument('--encoding', type=str, default='utf-8',
                         help="Codificación de caracteres a usar (ej. utf-8, ascii, latin-1).")
     parser.add_argument('--timestamp', type=str, default='none',
                         choices=["none", "ISO 8601", "Date|Time|Timezone", "Date|Time", "Time"],
                         help="Formato de timestamp a usar en la consola.")
     parser.add_argument('-l', '--log', type=str, help="Ruta al archivo para guardar el log.")
+    parser.add_argument('--flush-bytes', type=int, default=64 * 1024,
+                        help="Volcar el log al disco al acumular estos bytes (defecto: 65536).")
+    parser.add_argument('--flush-ms', type=int, default=1000,
+                        help="Volcar el log como mucho cada estos milisegundos, 0 = sin límite (defecto: 1000).")
+    parser.add_argument('--no-idle-flush', action='store_true',
+                        help="No volcar el log cuando no llegan datos; solo por tamaño o intervalo.")
+    parser.add_argument('--fsync-ms', type=int, default=0,
+                        help="Forzar fsync del log cada estos milisegundos, 0 = nunca (defecto: 0).")
+    parser.add_argument('--rotate-mb', type=float, default=0,
+                        help="Rotar el log al alcanzar este tamaño en MB, 0 = nunca (defecto: 0).")
+    parser.add_argument('--rotate-minutes', type=int, default=0,
+                        help="Rotar el log cada estos minutos de reloj, p. ej. 60 = cada hora en punto (defecto: 0).")
+    parser.add_argument('--compress', type=str, choices=['none', 'gzip', 'xz'], default='none',
+                        help="Comprimir en segundo plano los segmentos rotados (defecto: none).")
+    parser.add_argument('--retain-mb', type=float, default=0,
+                        help="Límite en MB del log y sus segmentos; se borran los más antiguos (0 = sin límite).")
+    parser.add_argument('--queue-size', type=int, default=1024,
+                        help="Capacidad (en bloques) de la cola entre el lector y la consola/log (defecto: 1024).")
+    parser.add_argument('--queue-policy', type=str, choices=BoundedQueue.POLICIES, default='block',
+                        help="Qué hacer si la cola se llena (defecto: block, sin pérdidas: el lector espera a la "
+                             "consola/log y los datos aguardan en el driver del puerto).")
+    parser.add_argument('--capture', type=str,
+                        help="Ruta a una captura binaria sin pérdidas (.slcap) con lo recibido y lo enviado.")
+    parser.add_argument('--replay', type=str, metavar='CAPTURA',
+                        help="Reproducir una captura .slcap en lugar de abrir puertos (consola, log y captura).")
+    parser.add_argument('--protocol', type=str, choices=DECODER_REGISTRY.names(),
+                        help="Decodificar con este protocolo: la consola muestra los registros decodificados y, si el "
+                             "protocolo es binario, también el log (útil con --replay).")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Velocidad de --replay: 1 = ritmo original, N = N veces más rápido, 0 = sin esperas.")
+    parser.add_argument('--view', type=str, metavar='LOG',
+                        help="Mostrar una ventana de líneas de un log (vía mmap, sin cargarlo) y salir.")
+    parser.add_argument('--line', type=int, default=0,
+                        help="Primera línea para --view, desde 0; negativa = contando desde el final (defecto: 0).")
+    parser.add_argument('--count', type=int, default=50, help="Número de líneas para --view (defecto: 50).")
+    parser.add_argument('--time', type=str, metavar='HORA',
+                        help="Con --view, ir a esta hora ('03:12:40' o '2026-10-16 03:12:40') usando el índice .tidx.")
+    parser.add_argument('--no-time-index', action='store_true',
+                        help="No escribir el índice de horas (.tidx) junto al log y la captura.")
+    parser.add_argument('--export-text', type=str, metavar='CAPTURA',
+                        help="Convertir una captura .slcap a texto (a --log o a la salida estándar) y salir.")
+    parser.add_argument('--benchmark', action='store_true', help="Ejecutar los micro-benchmarks internos y salir.")
     args = parser.parse_args()
-    if args.port or args.no_gui:
-        if not args.port: parser.error("--port es requerido para el modo CLI.")
+    if args.benchmark:
+        run_benchmark()
+    elif args.export_text:
+        sys.exit(run_export_text(args))
+    elif args.view:
+        run_view(args)
+    elif args.port or args.no_gui or args.replay:
+        if not args.port and not args.replay: parser.error("--port o --replay es requerido para el modo CLI.")
         run_cli_mode(args)
     else:
         app = SerialLoggerApp()